@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# benchmark.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+################################################################################
+#
+# Benchmark of the MineField game on a headless simulation (no Minecraft, no
+# GPIO). A scripted player walks from the base to the goal and back in an
+# in-memory world, for increasing numbers of mines.
+#
+# Usage: python3 benchmark.py [--mines 200 1000 ...] [--ticks 2000]
+#
+################################################################################
+
+import argparse
+import asyncio
+import contextlib
+import io
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from mcpi import block
+
+import minefield
+from fakeminecraft import FakeMinecraft, FakeWorld, ScriptedPlayer
+from gameengine import GameEngine
+from hitdetector import HitDetector
+from instrumentation import TickStats
+from gpiobackend import RecordingBackend
+from minedetector import MineDetector
+from pt3d import Pt3D
+
+# Largest danger map raster (number of tiles) computed by the benchmark
+maxDangerMapTiles = 50e6
+
+def scaledExtent(nbMines):
+    """Returns the mines extent keeping the mine density of the default game
+    settings (200 mines over +/- 100 blocks)."""
+    return round(minefield.extentMines * math.sqrt(nbMines / minefield.nbMines))
+
+def setupGame(nbMines, extentMines, useDangerMap, seed=0):
+    """Prepares a game on a headless simulation. Returns a tuple of the fake
+    Minecraft connection, the mine detector, the base and goal positions, the
+    nearest mine distance tracker, the setup duration (s) and whether a danger
+    map is used."""
+    random.seed(seed)
+    np.random.seed(seed)
+    world = FakeWorld()
+    mc = FakeMinecraft(world)
+    mineDetector = MineDetector(minefield.distBlue, minefield.distGreen,
+                                minefield.distYellow, minefield.distRed,
+                                backend=RecordingBackend(record=False))
+    dangerMap = useDangerMap and (2 * extentMines + 1) ** 2 <= maxDangerMapTiles
+
+    # time the preparation, without the progress messages
+    timeStart = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        base, goal, mines, proximityTracker = minefield.prepareMineField(
+            mc, nbMines, extentMines, minefield.goalDist, minefield.distBlue,
+            minefield.distMineTrigger, dangerMap)
+    setupTime = time.perf_counter() - timeStart
+
+    placeBlocks(mc, base, goal)
+    return mc, mineDetector, base, goal, proximityTracker, setupTime, dangerMap
+
+def placeBlocks(mc, base, goal):
+    """Places the base and goal blocks."""
+    mc.setBlock(base.x, base.y, base.z, block.GLOWING_OBSIDIAN)
+    mc.setBlock(goal.x, goal.y, goal.z, block.GOLD_BLOCK)
+
+def playerScript(mc, base, goal, speed):
+    """Sets a scripted player walking from the base to the goal and back,
+    destroying the goal and base blocks on the way."""
+    world = mc.world
+    def onGoal():
+        world.hitBlock(goal.x, goal.y, goal.z)
+        # walk back to the base, then destroy it
+        mc.player.script = ScriptedPlayer(
+            world, [(goal.x, goal.z), (base.x + 1, base.z)], speed,
+            lambda: world.hitBlock(base.x, base.y, base.z))
+    mc.player.script = ScriptedPlayer(
+        world, [(base.x + 1, base.z), (goal.x, goal.z)], speed, onGoal)
+    mc.player.setTilePos(base.x + 1, mc.getHeight(base.x + 1, base.z), base.z)
+
+def benchmarkPhases(mc, mineDetector, base, goal, proximityTracker, nbTicks):
+    """Runs the game loop phases synchronously for a number of ticks and
+    returns a dictionnary of the mean duration (s) of each phase."""
+    hitDetector = HitDetector(mc, [goal, base])
+    phases = {"fetch": 0., "proximity": 0., "detector": 0.}
+    dist2Last = math.inf
+    for i in range(nbTicks):
+        t0 = time.perf_counter()
+        with mc.batch() as b:
+            p = b.getTilePos()
+            hitDetector.queue(b)
+        p = p.result()
+        pos = Pt3D(p.x, p.y, p.z)
+        hitDetector.destroyed()
+        t1 = time.perf_counter()
+        dist2Min = proximityTracker.update2(pos)
+        t2 = time.perf_counter()
+        if dist2Min != dist2Last:
+            dist2Last = dist2Min
+            mineDetector.onDist2(dist2Min)
+        t3 = time.perf_counter()
+        phases["fetch"] += t1 - t0
+        phases["proximity"] += t2 - t1
+        phases["detector"] += t3 - t2
+    return {k: v / nbTicks for k, v in phases.items()}
+
+def benchmarkEngine(mc, mineDetector, base, goal, proximityTracker,
+                    stats=None):
+    """Runs the game engine without tick rate limit (the mines never explode)
+    until the scripted player completes the mission. Returns the number of
+    ticks per second.
+
+    Keyword arguments:
+    stats: the game loop statistics collector (TickStats type object), None
+        to run without instrumentation
+    """
+    hitDetector = HitDetector(mc, [goal, base])
+    engine = GameEngine(mc, mineDetector, proximityTracker, hitDetector, base,
+                        -1, 1e9, stats=stats)
+    proximityTracker.invalidate()
+    timeStart = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(engine.run())
+    return engine.ticks / (time.perf_counter() - timeStart)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the MineField game loop on a headless "
+                    "simulation.")
+    parser.add_argument("--mines", type=int, nargs="+",
+                        default=[200, 1000, 10000, 100000, 1000000],
+                        help="numbers of mines to benchmark")
+    parser.add_argument("--ticks", type=int, default=2000,
+                        help="number of ticks of the phases benchmark")
+    parser.add_argument("--speed", type=float, default=.25,
+                        help="player speed (tiles per tick)")
+    parser.add_argument("--no-danger-map", action="store_true",
+                        help="do not precompute the danger map")
+    parser.add_argument("--stats", metavar="PATH",
+                        help="write the game loop statistics of the engine "
+                             "runs to PATH_<mines>.json (or .csv)")
+    args = parser.parse_args()
+
+    print("{:>8} {:>6} {:>4} {:>9} {:>10} {:>10} {:>10} {:>10}".format(
+        "mines", "extent", "map", "setup(s)", "fetch(us)", "prox(us)",
+        "detect(us)", "ticks/s"))
+    for nbMines in args.mines:
+        extentMines = scaledExtent(nbMines)
+        mc, mineDetector, base, goal, proximityTracker, setupTime, dangerMap = \
+            setupGame(nbMines, extentMines, not args.no_danger_map)
+        try:
+            playerScript(mc, base, goal, args.speed)
+            phases = benchmarkPhases(mc, mineDetector, base, goal,
+                                     proximityTracker, args.ticks)
+            placeBlocks(mc, base, goal)
+            playerScript(mc, base, goal, args.speed)
+            stats = None if args.stats is None else TickStats()
+            ticksPerSec = benchmarkEngine(mc, mineDetector, base, goal,
+                                          proximityTracker, stats)
+            if stats is not None:
+                root, ext = os.path.splitext(args.stats)
+                stats.dump("%s_%d%s" % (root, nbMines, ext or ".json"))
+        finally:
+            mineDetector.stop()
+        print("{:>8} {:>6} {:>4} {:>9.2f} {:>10.1f} {:>10.1f} {:>10.1f} "
+              "{:>10.0f}".format(nbMines, extentMines,
+                                 "yes" if dangerMap else "no", setupTime,
+                                 phases["fetch"] * 1e6,
+                                 phases["proximity"] * 1e6,
+                                 phases["detector"] * 1e6, ticksPerSec))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+# blockbuffer.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import itertools
+import math
+
+class BlockWriteBuffer:
+    """A class collecting block writes to Minecraft and sending them in a
+    single burst. Writes to a block overwritten later are dropped and adjacent
+    blocks of the same type are merged into cuboids so that the fewest
+    setBlock/setBlocks calls are sent. Can be used as a context manager that
+    flushes the buffer on exit:
+
+        with BlockWriteBuffer(mc) as buf:
+            buf.setBlocks(x0, y0, z0, x1, y1, z1, block.AIR)
+            buf.setBlock(x, y, z, block.GRAVEL)
+    """
+
+    def __init__(self, mc):
+        """Constructor. Returns a BlockWriteBuffer object instance.
+
+        Keyword arguments:
+        mc: the connection to Minecraft. If it supports batches
+            (BatchMinecraft type object), the calls are sent in one batch.
+        """
+        self._mc = mc
+        self._blocks = {}       # (x, y, z) -> block type of the last write
+
+    def __len__(self):
+        """Returns the number of blocks in the buffer."""
+        return len(self._blocks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        # only flush the buffer if the block completed normally
+        if excType is None:
+            self.flush()
+        return False
+
+    def setBlock(self, x, y, z, blockType):
+        """Buffers the write of a block.
+
+        Keyword arguments:
+        x, y, z: the block position
+        blockType: the block type id
+        """
+        self._blocks[(math.floor(x), math.floor(y), math.floor(z))] = blockType
+
+    def setBlocks(self, x0, y0, z0, x1, y1, z1, blockType):
+        """Buffers the write of all the blocks of a cuboid. The cuboid is
+        expanded into individual blocks so it is meant for effect sized
+        cuboids, not for large areas.
+
+        Keyword arguments:
+        x0, y0, z0: the position of a corner of the cuboid
+        x1, y1, z1: the position of the opposite corner of the cuboid
+        blockType: the block type id
+        """
+        x0, x1 = sorted((math.floor(x0), math.floor(x1)))
+        y0, y1 = sorted((math.floor(y0), math.floor(y1)))
+        z0, z1 = sorted((math.floor(z0), math.floor(z1)))
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                for z in range(z0, z1 + 1):
+                    self._blocks[(x, y, z)] = blockType
+
+    def cuboids(self):
+        """Returns the list of (x0, y0, z0, x1, y1, z1, blockType) cuboids
+        covering the buffered blocks. Cuboids are grown greedily along each
+        axis in turn; all the axis orders are tried and the shortest list is
+        returned."""
+        best = None
+        for order in itertools.permutations(range(3)):
+            cuboids = self._greedyCuboids(order)
+            if best is None or len(cuboids) < len(best):
+                best = cuboids
+        return best if best is not None else []
+
+    def _greedyCuboids(self, order):
+        """Returns a list of cuboids covering the buffered blocks, growing each
+        cuboid from the lowest remaining block along the axes in the specified
+        order (tuple of axis numbers, 0: x, 1: y, 2: z)."""
+        blocks = self._blocks
+        done = set()
+        cuboids = []
+        for start in sorted(blocks, key=lambda p: tuple(p[a] for a in
+                                                          reversed(order))):
+            if start in done:
+                continue
+            blockType = blocks[start]
+            lo = list(start)
+            hi = list(start)
+
+            def free(p):
+                """Returns True if the block can be added to the cuboid."""
+                return (p not in done and p in blocks
+                        and blocks[p] == blockType)
+
+            # grow along each axis while the whole next slice matches
+            for axis in order:
+                while True:
+                    ranges = [range(lo[a], hi[a] + 1) for a in range(3)]
+                    ranges[axis] = [hi[axis] + 1]
+                    if not all(free(p) for p in itertools.product(*ranges)):
+                        break
+                    hi[axis] += 1
+
+            done.update(itertools.product(*[range(lo[a], hi[a] + 1)
+                                            for a in range(3)]))
+            cuboids.append((lo[0], lo[1], lo[2], hi[0], hi[1], hi[2],
+                            blockType))
+        return cuboids
+
+    def flush(self):
+        """Sends the buffered blocks to Minecraft and clears the buffer.
+        Returns the number of calls sent."""
+        cuboids = self.cuboids()
+        self._blocks = {}
+        if not cuboids:
+            return 0
+
+        if hasattr(self._mc, "batch"):
+            with self._mc.batch() as b:
+                self._send(b, cuboids)
+        else:
+            self._send(self._mc, cuboids)
+        return len(cuboids)
+
+    def _send(self, mc, cuboids):
+        """Sends the cuboids with setBlock or setBlocks calls."""
+        for x0, y0, z0, x1, y1, z1, blockType in cuboids:
+            if (x0, y0, z0) == (x1, y1, z1):
+                mc.setBlock(x0, y0, z0, blockType)
+            else:
+                mc.setBlocks(x0, y0, z0, x1, y1, z1, blockType)
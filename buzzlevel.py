@@ -27,64 +27,121 @@
 
 import threading
 import time
-from gpiozero import Buzzer
+
+from scheduler import Scheduler
 
 class BuzzLevel:
     """A buzzer class for use in MineField Minecraft game for Raspbery Pi. The
     buzzer emits a number of short beeps corresponding to the specified level
-    (0 to 4). An active buzzer must be connected to GPIO pin 4."""
+    (0 to 4). An active buzzer must be connected to GPIO pin 4.
+
+    The beeps are timed by a Scheduler (single thread shared with the mine
+    detector LEDs blinking). Each one second cycle beeps the level set at its
+    start; at level 0 no cycle is scheduled and the scheduler stays idle.
+    """
+
+    def __init__(self, buzzerClass=None, scheduler=None):
+        """Constructor. Returns a BuzzLevel object instance
 
-    def __init__(self):
-        """Constructor. Returns a BuzzLevel object instance"""
-        self._buzzer = Buzzer(4)    # gpiozero Buzzer object on pin 4.
+        Keyword arguments:
+        buzzerClass: class of the buzzer device, called with the pin number
+            (gpiozero Buzzer by default, nullgpio.NullBuzzer to run without
+            GPIO)
+        scheduler: the scheduler timing the beeps (Scheduler type object, a
+            new scheduler stopped with the buzzer by default)
+        """
+        if buzzerClass is None:
+            from gpiozero import Buzzer
+            buzzerClass = Buzzer
+        self._buzzer = buzzerClass(4)   # Buzzer object on pin 4.
+        self._ownScheduler = scheduler is None
+        self._scheduler = Scheduler() if scheduler is None else scheduler
         self._onTime = .01          # beep duration
         self._offTime = .19         # beep silence duration
         self._level = 0             # beep level initialized to 0
         self._active = False        # object active state initialized to False
+        self._timer = None          # next scheduled beep event
+        self._run = 0               # beep run, incremented by run()
+        self._lock = threading.Lock()
         self.run()                  # activate object
 
-    def _beep(self, on):
-        """Beeps the buzzer once followed by a silence.
+    def _schedule(self, deadline, func, *args):
+        """Schedules the next beep event (lock held)."""
+        self._timer = self._scheduler.scheduleAt(deadline, func, self._run,
+                                                 *args)
+
+    def _current(self, run):
+        """Returns True if the events of beep run run are still current (lock
+        held)."""
+        return self._active and run == self._run
+
+    def _cycle(self, run, start):
+        """Starts a beep cycle at time start, with the current level. Leaves
+        the scheduler idle at level 0.
 
         Keyword arguments:
-        on: Produces a beep if True, produces a silence if False.
+        run: the beep run of the event (events of a stopped run are ignored)
+        start: the start time of the cycle (time.monotonic clock)
         """
-        if on:
-            self._buzzer.on()
-            time.sleep(self._onTime)
-            self._buzzer.off()
-            time.sleep(self._offTime)
-        else:
-            time.sleep(self._onTime + self._offTime)
-
-    def _beepLevel(self):
-        """Beeps the buzzer a number of times set by the level attribute followed
-        by a number of silences so that the total duration is always constant."""
+        with self._lock:
+            if not self._current(run):
+                return
+            if self._level == 0:
+                self._timer = None
+                return
+            self._startBeep(start, 0, self._level)
 
-        for i in range(self._level):
-            self._beep(True)
-        for i in range(5 - self._level):
-            self._beep(False)
+    def _beepOn(self, run, start, beep, level):
+        """Starts a beep.
 
-    def run(self):
-        """Launches the _run method in a dedicated thread so it can run in the
-        background while the calling program continues.
+        Keyword arguments:
+        run: the beep run of the event
+        start: the start time of the cycle
+        beep: the number of the beep in the cycle
+        level: the number of beeps of the cycle
         """
+        with self._lock:
+            if self._current(run):
+                self._startBeep(start, beep, level)
 
-        if not self._active:
-            thread1 = threading.Thread(target = self._run, args = [])
-            thread1.start()
-
-    def _run(self):
-        """Executes the beepLevel method as long as the _active attribute is
-        True."""
+    def _startBeep(self, start, beep, level):
+        """Turns the buzzer on and schedules the end of the beep (lock held).
+        """
+        self._buzzer.on()
+        self._schedule(start + beep * (self._onTime + self._offTime)
+                       + self._onTime, self._beepOff, start, beep, level)
+
+    def _beepOff(self, run, start, beep, level):
+        """Ends a beep and schedules the next one, or the next cycle so that
+        the cycle duration is always constant (5 beeps and silences)."""
+        with self._lock:
+            if not self._current(run):
+                return
+            self._buzzer.off()
+            period = self._onTime + self._offTime
+            if beep + 1 < level:
+                self._schedule(start + (beep + 1) * period, self._beepOn,
+                               start, beep + 1, level)
+            else:
+                self._schedule(start + 5 * period, self._cycle,
+                               start + 5 * period)
 
-        self._active = True
-        while self._active:
-            self._beepLevel()
+    def run(self):
+        """Activates the buzzer: beep cycles are scheduled as long as the level
+        is greater than 0.
+        """
+        with self._lock:
+            if self._active:
+                return
+            self._active = True
+            self._run += 1          # new beep run
+            if self._level > 0:
+                now = time.monotonic()
+                self._schedule(now, self._cycle, now)
 
     def setLevel(self, level):
-        """Sets the buzzer _level attribute.
+        """Sets the buzzer _level attribute. The new level is beeped from the
+        next beep cycle.
 
         Keyword arguments:
         level: the number of beeps to be produced (0 to 4)
@@ -93,7 +150,12 @@ class BuzzLevel:
             if type(level) != int:  # check that level is an integer
                 raise TypeError("level must be an integer.")
             elif level >=0 and level <= 4: # check that level is between 0 and 4
-                self._level = level # set _level attribute
+                with self._lock:
+                    self._level = level # set _level attribute
+                    # start a cycle right away if the buzzer was idle
+                    if self._active and self._timer is None and level > 0:
+                        now = time.monotonic()
+                        self._schedule(now, self._cycle, now)
             else:
                 raise ValueError("level must be between 0 and 4.")
 
@@ -104,6 +166,18 @@ class BuzzLevel:
             raise
 
     def stop(self):
-        """Sets the _active attribute to False. The background thread will stop
-        automatically at the end of the current loop."""
-        self._active = False
+        """Stops the buzzer immediately: the pending beep event is cancelled
+        and the buzzer turned off. The scheduler is stopped if it is owned by
+        the buzzer."""
+        with self._lock:
+            self._active = False
+            if self._timer is not None:
+                self._scheduler.cancel(self._timer)
+                self._timer = None
+            self._buzzer.off()
+            scheduler = self._scheduler
+            if self._ownScheduler:
+                # fresh scheduler (no thread until used) if run again
+                self._scheduler = Scheduler()
+        if self._ownScheduler:
+            scheduler.stop()
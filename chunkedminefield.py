@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# chunkedminefield.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import collections
+import math
+
+import numpy as np
+
+from pointarray import PointArray
+from pt3d import Pt3D
+
+class ChunkedMineField:
+    """A class defining an unbounded mine field divided in square chunks in the
+    horizontal (xz) plane. The mines of a chunk are only generated when a query
+    needs them, from a random generator seeded with the field seed and the
+    chunk coordinates, so that a chunk always contains the same mines. Only the
+    most recently used chunks are kept in memory (least recently used chunks
+    are dropped and generated again when needed).
+
+    The proximity queries have the same interface as the MineIndex class so a
+    ChunkedMineField can be used in its place (e.g. by a ProximityTracker).
+    """
+
+    def __init__(self, density, seed=0, chunkSize=64, maxChunks=256,
+                 mineY=-64):
+        """Constructor. Returns a ChunkedMineField object instance.
+
+        Keyword arguments:
+        density: the average number of mines per tile
+        seed: the seed of the mine field
+        chunkSize: the side length of the chunks
+        maxChunks: the maximum number of chunks kept in memory (the memory
+            used is about maxChunks * density * chunkSize**2 * 24 bytes)
+        mineY: the y coordinate of the mines
+        """
+        if chunkSize <= 0:
+            raise ValueError("chunkSize must be greater than 0.")
+        if maxChunks <= 0:
+            raise ValueError("maxChunks must be greater than 0.")
+        self._density = density
+        self._seed = seed
+        self._chunkSize = chunkSize
+        self._maxChunks = maxChunks
+        self._mineY = mineY
+        self._chunks = collections.OrderedDict() # chunk -> PointArray of mines
+        self._cleared = []          # (point, radius) of the cleared zones
+        self.generated = 0          # number of chunks generated
+
+    def __len__(self):
+        """Returns the number of chunks in memory."""
+        return len(self._chunks)
+
+    def _generate(self, key):
+        """Returns the mines (PointArray type object) of a chunk."""
+        cx, cz = key
+        # generator seeded with the field seed and the chunk coordinates
+        rng = np.random.default_rng([self._seed & 0xffffffff,
+                                     cx & 0xffffffff, cz & 0xffffffff])
+        n = rng.poisson(self._density * self._chunkSize**2)
+        mines = PointArray(np.column_stack((
+            rng.integers(0, self._chunkSize, n) + cx * self._chunkSize,
+            np.full(n, self._mineY),
+            rng.integers(0, self._chunkSize, n) + cz * self._chunkSize)))
+
+        # remove the mines of the cleared zones
+        for pt, radius in self._cleared:
+            if self._chunkDist(key, pt) <= radius:
+                mines = mines.select(~mines.maskWithin(pt, radius))
+        self.generated += 1
+        return mines
+
+    def _chunkDist(self, key, pt):
+        """Returns the distance from point pt to the nearest tile of a chunk in
+        the horizontal (xz) plane."""
+        x0 = key[0] * self._chunkSize
+        z0 = key[1] * self._chunkSize
+        dx = max(x0 - pt.x, 0, pt.x - (x0 + self._chunkSize - 1))
+        dz = max(z0 - pt.z, 0, pt.z - (z0 + self._chunkSize - 1))
+        return math.hypot(dx, dz)
+
+    def _chunk(self, key):
+        """Returns the mines of a chunk, generating it if it is not in memory
+        and dropping the least recently used chunk if needed."""
+        mines = self._chunks.get(key)
+        if mines is None:
+            mines = self._generate(key)
+            self._chunks[key] = mines
+            if len(self._chunks) > self._maxChunks:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(key)
+        return mines
+
+    def _keysAround(self, pt, radius):
+        """Returns the coordinates of the chunks intersecting the square of
+        half side radius centered on point pt."""
+        size = self._chunkSize
+        cx0 = math.floor((pt.x - radius) / size)
+        cx1 = math.floor((pt.x + radius) / size)
+        cz0 = math.floor((pt.z - radius) / size)
+        cz1 = math.floor((pt.z + radius) / size)
+        return [(cx, cz) for cx in range(cx0, cx1 + 1)
+                for cz in range(cz0, cz1 + 1)]
+
+    def withinArray(self, pt, radius):
+        """Returns the mines located within a distance radius of point pt in the
+        horizontal (xz) plane as a PointArray type object.
+
+        Keyword arguments:
+        pt: the point to search around (Pt3D type object)
+        radius: the search distance
+        """
+        found = []
+        for key in self._keysAround(pt, radius):
+            if self._chunkDist(key, pt) > radius:
+                continue
+            mines = self._chunk(key)
+            found.append(mines.coords[mines.maskWithin(pt, radius)])
+        if not found:
+            return PointArray()
+        return PointArray(np.concatenate(found))
+
+    def within(self, pt, radius):
+        """Returns the list of mines (Pt3D type objects) located within a
+        distance radius of point pt in the horizontal (xz) plane.
+
+        Keyword arguments:
+        pt: the point to search around (Pt3D type object)
+        radius: the search distance
+        """
+        return self.withinArray(pt, radius).toPt3D()
+
+    def nearest(self, pt, maxDist):
+        """Returns a (mine, distance) tuple for the mine nearest to point pt in
+        the horizontal (xz) plane. Only mines within maxDist are considered;
+        (None, math.inf) is returned if there are none.
+
+        Keyword arguments:
+        pt: the point to search around (Pt3D type object)
+        maxDist: the maximum distance to search
+        """
+        mines = self.withinArray(pt, maxDist)
+        i = mines.argminDist(pt)
+        if i < 0:
+            return (None, math.inf)
+        return (mines[i], float(mines.distAxes(pt, 5)[i]))
+
+    def removeWithin(self, pt, radius):
+        """Clears the mines located within a distance radius of point pt in the
+        horizontal (xz) plane and returns the cleared mines of the chunks in
+        memory in a list. The zone stays cleared when its chunks are generated
+        again.
+
+        Keyword arguments:
+        pt: the point to clear around (Pt3D type object)
+        radius: the clearing distance
+        """
+        self._cleared.append((Pt3D(*pt.coords()), radius))
+        removed = []
+        for key in self._keysAround(pt, radius):
+            mines = self._chunks.get(key)
+            if mines is None:
+                continue
+            mask = mines.maskWithin(pt, radius)
+            if mask.any():
+                removed += mines.select(mask).toPt3D()
+                self._chunks[key] = mines.select(~mask)
+        return removed
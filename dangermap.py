@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# dangermap.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+
+import numpy as np
+
+class DangerMap:
+    """A class defining a precomputed raster of the horizontal (xz) distance to
+    the nearest mine for every tile of a square area. Since the mines do not
+    move during a game, the distance at the player position becomes a single
+    array lookup. The raster is exact for tiles (integer coordinates) as long
+    as the mines are also located on tiles.
+    """
+
+    def __init__(self, mines, center, extent, maxDist):
+        """Constructor. Returns a DangerMap object instance.
+
+        Keyword arguments:
+        mines: the mines (PointArray type object)
+        center: the center of the raster area (Pt3D type object)
+        extent: the extent of the raster area around the center (+/-)
+        maxDist: the maximum distance stored in the raster (e.g. distBlue).
+            Tiles without any mine within that distance store math.inf.
+        """
+        self._x0 = int(center.x) - extent   # x coordinate of raster index 0
+        self._z0 = int(center.z) - extent   # z coordinate of raster index 0
+        self._size = 2 * extent + 1         # raster side length
+
+        # occupancy grid of the mines, with a margin of maxDist around the
+        # raster so that mines just outside the raster are accounted for
+        r = int(maxDist)
+        n = self._size + 2 * r
+        mx = mines.coords[:, 0].astype(np.int64) - self._x0 + r
+        mz = mines.coords[:, 2].astype(np.int64) - self._z0 + r
+        inside = (mx >= 0) & (mx < n) & (mz >= 0) & (mz < n)
+        occupied = np.zeros((n, n), bool)
+        occupied[mx[inside], mz[inside]] = True
+
+        # the squared euclidean distance transform is separable. First pass:
+        # distance along x to the nearest mine on the same z line, from the
+        # index of the last mine before and the first mine after each tile
+        ix = np.arange(n)[:, np.newaxis]
+        before = np.where(occupied, ix, -n)
+        before = np.maximum.accumulate(before, axis=0)
+        after = np.where(occupied, ix, 2 * n)
+        after = np.minimum.accumulate(after[::-1], axis=0)[::-1]
+        gx2 = np.minimum(ix - before, after - ix).astype(np.float32)**2
+
+        # second pass: combine the x distances of the z lines within maxDist
+        dist2 = np.full((self._size, self._size), np.inf, np.float32)
+        for dz in range(-r, r + 1):
+            np.minimum(dist2, gx2[r:r + self._size, r + dz:r + dz + self._size]
+                       + dz**2, out=dist2)
+
+        # distances beyond maxDist are not relevant to the mine detector
+        dist2[dist2 > maxDist**2] = np.inf
+        self._dist = np.sqrt(dist2)
+
+    def dist(self, pt):
+        """Returns the horizontal distance from point pt to the nearest mine
+        (math.inf if no mine is within maxDist), or None if the point is
+        outside the raster area.
+
+        Keyword arguments:
+        pt: the point (Pt3D type object), normally a player tile position
+        """
+        ix = math.floor(pt.x) - self._x0
+        iz = math.floor(pt.z) - self._z0
+        if 0 <= ix < self._size and 0 <= iz < self._size:
+            return float(self._dist[ix, iz])
+        return None
@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+
+# fakeminecraft.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+################################################################################
+#
+# A fake Minecraft Pi server for running the game without Minecraft.
+#
+# The FakeWorld class holds a simple in-memory world and the
+# FakeMinecraftServer class serves it over TCP using the Minecraft Pi API text
+# protocol, so that mcpi.minecraft.Minecraft.create() can connect to it:
+#
+#     world = FakeWorld()
+#     with FakeMinecraftServer(world) as server:
+#         mc = Minecraft.create(*server.address)
+#
+# For headless simulations, the FakeMinecraft class gives direct access to a
+# FakeWorld with the same interface, and the ScriptedPlayer class walks the
+# player along a path (also through the server, with the script attribute of
+# the world).
+#
+################################################################################
+
+import hashlib
+import math
+import socketserver
+import threading
+import time
+
+from mcpi.event import BlockEvent
+from mcpi.util import flatten
+from mcpi.vec3 import Vec3
+
+from mcbatch import Future
+
+# Block ids used by the fake world
+AIR = 0
+STONE = 1
+GRASS = 2
+WATER = 9
+
+class FakeWorld:
+    """A class defining a simple in-memory Minecraft world: a terrain of
+    constant height covered with grass (and optionally water), the blocks set
+    through the API, the players positions, the chat and the block hit events.
+    Methods are thread safe.
+    """
+
+    def __init__(self, groundHeight=0, waterFraction=0., seed=0):
+        """Constructor. Returns a FakeWorld object instance.
+
+        Keyword arguments:
+        groundHeight: the height of the terrain (y of the first air block)
+        waterFraction: the fraction of the surface covered by water
+        seed: the seed of the pseudo-random water placement
+        """
+        self.groundHeight = groundHeight
+        self.waterFraction = waterFraction
+        self.seed = seed
+        self.chat = []              # messages posted to the chat
+        self.requests = 0           # number of API requests handled
+        self._blocks = {}           # (x, y, z) -> block id set through the API
+        self._columns = {}          # (x, z) -> set of y of the blocks set
+        self._players = {0: [0, groundHeight, 0]}   # entity id -> tile pos
+        self._hits = []             # pending block hit events
+        self._lock = threading.RLock()
+        # optional scripted player (ScriptedPlayer type object) moved one
+        # step each time a client reads the player position through the server
+        self.script = None
+
+    def _terrainBlock(self, x, y, z):
+        """Returns the id of the terrain block at position x, y, z."""
+        if y >= self.groundHeight:
+            return AIR
+        if y == self.groundHeight - 1 and self.waterFraction > 0:
+            # pseudo-random but reproducible water tiles
+            h = hashlib.md5(("%d,%d,%d" % (self.seed, x, z)).encode()).digest()
+            if h[0] / 256 < self.waterFraction:
+                return WATER
+        if y == self.groundHeight - 1:
+            return GRASS
+        return STONE
+
+    ## World API
+
+    def getBlock(self, x, y, z):
+        """Returns the id of the block at position x, y, z."""
+        with self._lock:
+            if (x, y, z) in self._blocks:
+                return self._blocks[(x, y, z)]
+            return self._terrainBlock(x, y, z)
+
+    def getHeight(self, x, z):
+        """Returns the y position of the first air block above the highest
+        non-air block of column x, z."""
+        with self._lock:
+            ys = self._columns.get((x, z), ())
+            y = max([self.groundHeight] + [y + 1 for y in ys])
+            while y > -64 and self.getBlock(x, y - 1, z) == AIR:
+                y -= 1
+            return y
+
+    def setBlock(self, x, y, z, blockType):
+        """Sets the block at position x, y, z."""
+        with self._lock:
+            self._blocks[(x, y, z)] = blockType
+            self._columns.setdefault((x, z), set()).add(y)
+
+    def setBlocks(self, x0, y0, z0, x1, y1, z1, blockType):
+        """Sets all the blocks of a cuboid."""
+        with self._lock:
+            for x in range(min(x0, x1), max(x0, x1) + 1):
+                for y in range(min(y0, y1), max(y0, y1) + 1):
+                    for z in range(min(z0, z1), max(z0, z1) + 1):
+                        self.setBlock(x, y, z, blockType)
+
+    def getTilePos(self, entityId=0):
+        """Returns the [x, y, z] tile position of a player."""
+        with self._lock:
+            return list(self._players[entityId])
+
+    def setTilePos(self, x, y, z, entityId=0):
+        """Sets the tile position of a player (created if needed)."""
+        with self._lock:
+            self._players[entityId] = [x, y, z]
+
+    def postToChat(self, msg):
+        """Posts a message to the chat."""
+        with self._lock:
+            self.chat.append(msg)
+
+    def hitBlock(self, x, y, z, entityId=0, destroy=True):
+        """Simulates a player hitting a block with a sword: queues a block hit
+        event and destroys the block if destroy is True."""
+        x, y, z = math.floor(x), math.floor(y), math.floor(z)
+        with self._lock:
+            self._hits.append((x, y, z, 1, entityId))
+            if destroy:
+                self.setBlock(x, y, z, AIR)
+
+    def pollBlockHits(self):
+        """Returns and clears the pending block hit events as a list of
+        (x, y, z, face, entityId) tuples."""
+        with self._lock:
+            hits = self._hits
+            self._hits = []
+            return hits
+
+    ## Protocol
+
+    def handle(self, line):
+        """Executes a Minecraft Pi API request line and returns the reply
+        string, or None for commands without reply."""
+        name, _, args = line.strip().partition("(")
+        args = args[:-1] if args.endswith(")") else args
+        with self._lock:
+            self.requests += 1
+            if name == "chat.post":
+                self.postToChat(args)
+                return None
+            try:
+                values = [int(float(a)) for a in args.split(",") if a != ""]
+                return self._handleValues(name, values)
+            except (KeyError, TypeError, ValueError):
+                return "Fail"
+
+    def _handleValues(self, name, v):
+        """Executes an API request with numerical arguments."""
+        if name == "world.getBlock":
+            return str(self.getBlock(*v))
+        if name == "world.getBlocks":
+            x0, y0, z0, x1, y1, z1 = v
+            return ",".join(str(self.getBlock(x, y, z))
+                            for y in range(min(y0, y1), max(y0, y1) + 1)
+                            for x in range(min(x0, x1), max(x0, x1) + 1)
+                            for z in range(min(z0, z1), max(z0, z1) + 1))
+        if name == "world.getHeight":
+            return str(self.getHeight(*v))
+        if name == "world.setBlock":
+            self.setBlock(*v[:4])
+            return None
+        if name == "world.setBlocks":
+            self.setBlocks(*v[:7])
+            return None
+        if name == "player.getTile":
+            if self.script is not None:
+                self.script.step()
+            return ",".join(map(str, self.getTilePos()))
+        if name == "player.getPos":
+            return ",".join(str(c + .5) for c in self.getTilePos())
+        if name in ("player.setTile", "player.setPos"):
+            self.setTilePos(*v[:3])
+            return None
+        if name == "entity.getTile":
+            return ",".join(map(str, self.getTilePos(v[0])))
+        if name in ("entity.setTile", "entity.setPos"):
+            self.setTilePos(*v[1:4], entityId=v[0])
+            return None
+        if name == "events.block.hits":
+            return "|".join(",".join(map(str, hit))
+                            for hit in self.pollBlockHits())
+        if name == "events.clear":
+            self.pollBlockHits()
+            return None
+        return "Fail"
+
+class _FakeMinecraftHandler(socketserver.StreamRequestHandler):
+    """Request handler of the FakeMinecraftServer (one per connection)."""
+
+    def handle(self):
+        pending = b""           # incomplete request line
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                break
+            # simulate the network round trip once per packet received
+            if self.server.latency > 0:
+                time.sleep(self.server.latency)
+            *lines, pending = (pending + data).split(b"\n")
+            replies = []
+            for line in lines:
+                reply = self.server.world.handle(line.decode("utf-8"))
+                if reply is not None:
+                    replies.append(reply + "\n")
+            if replies:
+                self.request.sendall("".join(replies).encode("utf-8"))
+
+class FakeMinecraftServer(socketserver.ThreadingTCPServer):
+    """A class defining a TCP server serving a FakeWorld with the Minecraft Pi
+    API protocol. The server runs in a background thread."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, world, host="localhost", port=0, latency=0.):
+        """Constructor. Returns a FakeMinecraftServer object instance.
+
+        Keyword arguments:
+        world: the world to serve (FakeWorld type object)
+        host: the host address to listen on
+        port: the port to listen on (0 selects a free port)
+        latency: simulated network delay (s) applied to each packet received
+        """
+        socketserver.ThreadingTCPServer.__init__(self, (host, port),
+                                                 _FakeMinecraftHandler)
+        self.world = world
+        self.latency = latency
+        self._thread = None
+
+    @property
+    def address(self):
+        """Returns the (host, port) tuple the server listens on."""
+        return self.server_address[:2]
+
+    def start(self):
+        """Starts serving in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops serving and closes the server socket."""
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+        return False
+
+class _LocalBatch:
+    """A class defining a batch of calls on a FakeMinecraft object, with the
+    same interface as mcbatch.Batch. The calls are executed immediately."""
+
+    def __init__(self, mc):
+        """Constructor. Returns a _LocalBatch object instance.
+
+        Keyword arguments:
+        mc: the fake Minecraft connection (FakeMinecraft type object)
+        """
+        self._mc = mc
+        self._calls = 0             # number of calls made
+
+    def __len__(self):
+        """Returns the number of calls made (queued in a real batch)."""
+        return self._calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+    def send(self):
+        """Does nothing, the calls are already executed."""
+
+    def getBlock(self, *args):
+        """Get block (x,y,z) => Future of id:int"""
+        self._calls += 1
+        return Future.fromValue(self._mc.getBlock(*args))
+
+    def getHeight(self, *args):
+        """Get height (x,z) => Future of int"""
+        self._calls += 1
+        return Future.fromValue(self._mc.getHeight(*args))
+
+    def getBlocks(self, *args):
+        """Get a cuboid of blocks (x0,y0,z0,x1,y1,z1) => Future of [id:int]"""
+        self._calls += 1
+        return Future.fromValue(self._mc.getBlocks(*args))
+
+    def getTilePos(self):
+        """Get player tile position => Future of Vec3"""
+        self._calls += 1
+        return Future.fromValue(self._mc.player.getTilePos())
+
+    def getEntityTilePos(self, id):
+        """Get entity tile position (entityId:int) => Future of Vec3"""
+        self._calls += 1
+        return Future.fromValue(self._mc.entity.getTilePos(id))
+
+    def pollBlockHits(self):
+        """Get block hits events => Future of [BlockEvent]"""
+        self._calls += 1
+        return Future.fromValue(self._mc.events.pollBlockHits())
+
+    def setBlock(self, *args):
+        """Set block (x,y,z,id)"""
+        self._calls += 1
+        self._mc.setBlock(*args)
+
+    def setBlocks(self, *args):
+        """Set a cuboid of blocks (x0,y0,z0,x1,y1,z1,id)"""
+        self._calls += 1
+        self._mc.setBlocks(*args)
+
+    def setTilePos(self, *args):
+        """Set player tile position (x,y,z)"""
+        self._calls += 1
+        self._mc.player.setTilePos(*args)
+
+    def postToChat(self, msg):
+        """Post a message to the game chat"""
+        self._calls += 1
+        self._mc.postToChat(msg)
+
+class _FakePlayer:
+    """The player and entity API of a FakeMinecraft object."""
+
+    def __init__(self, world, entityId=None, script=None):
+        """Constructor. Returns a _FakePlayer object instance.
+
+        Keyword arguments:
+        world: the world (FakeWorld type object)
+        entityId: the entity id of the player, None for the entity API where
+            the id is the first argument of the calls
+        script: optional scripted player (ScriptedPlayer type object)
+        """
+        self._world = world
+        self._entityId = entityId
+        self.script = script        # may be set once the game is prepared
+
+    def _id(self, args):
+        """Returns the entity id and the remaining arguments of a call."""
+        if self._entityId is None:
+            return args[0], args[1:]
+        return self._entityId, args
+
+    def getTilePos(self, *args):
+        """Get tile position ([entityId]) => Vec3"""
+        entityId, args = self._id(args)
+        if self.script is not None:
+            self.script.step()
+        return Vec3(*self._world.getTilePos(entityId))
+
+    def setTilePos(self, *args):
+        """Set tile position ([entityId], x,y,z)"""
+        entityId, args = self._id(args)
+        x, y, z = [math.floor(a) for a in args]
+        self._world.setTilePos(x, y, z, entityId)
+
+class _FakeEvents:
+    """The events API of a FakeMinecraft object."""
+
+    def __init__(self, world):
+        self._world = world
+
+    def pollBlockHits(self):
+        """Get and clear the block hits events => [BlockEvent]"""
+        return [BlockEvent.Hit(*hit) for hit in self._world.pollBlockHits()]
+
+    def clearAll(self):
+        """Clear all old events"""
+        self._world.pollBlockHits()
+
+class FakeMinecraft:
+    """A class giving direct (in-process) access to a FakeWorld with the
+    interface of a BatchMinecraft object, for headless simulations without any
+    network round trip."""
+
+    def __init__(self, world, script=None):
+        """Constructor. Returns a FakeMinecraft object instance.
+
+        Keyword arguments:
+        world: the world (FakeWorld type object)
+        script: optional scripted player (ScriptedPlayer type object) moving
+            the player one step each time its position is read (can also be
+            set later through the player.script attribute)
+        """
+        self.world = world
+        self.player = _FakePlayer(world, 0, script)
+        self.entity = _FakePlayer(world)
+        self.events = _FakeEvents(world)
+
+    def batch(self):
+        """Returns a batch of calls (executed immediately)."""
+        return _LocalBatch(self)
+
+    def getBlock(self, *args):
+        """Get block (x,y,z) => id:int"""
+        x, y, z = [math.floor(a) for a in args]
+        return self.world.getBlock(x, y, z)
+
+    def getHeight(self, *args):
+        """Get the height of the world (x,z) => int"""
+        x, z = [math.floor(a) for a in args]
+        return self.world.getHeight(x, z)
+
+    def getBlocks(self, *args):
+        """Get a cuboid of blocks (x0,y0,z0,x1,y1,z1) => [id:int], ordered by
+        y, x then z"""
+        x0, y0, z0, x1, y1, z1 = [math.floor(a) for a in args]
+        return [self.world.getBlock(x, y, z)
+                for y in range(min(y0, y1), max(y0, y1) + 1)
+                for x in range(min(x0, x1), max(x0, x1) + 1)
+                for z in range(min(z0, z1), max(z0, z1) + 1)]
+
+    def setBlock(self, *args):
+        """Set block (x,y,z,id)"""
+        x, y, z, blockType = [math.floor(a) for a in list(flatten(args))[:4]]
+        self.world.setBlock(x, y, z, blockType)
+
+    def setBlocks(self, *args):
+        """Set a cuboid of blocks (x0,y0,z0,x1,y1,z1,id)"""
+        self.world.setBlocks(*[math.floor(a) for a in list(flatten(args))[:7]])
+
+    def postToChat(self, msg):
+        """Post a message to the game chat"""
+        self.world.postToChat(str(msg))
+
+class ScriptedPlayer:
+    """A class moving the player of a FakeWorld along a path of waypoints, one
+    step at a time. At the end of the path, an optional function is called
+    once (e.g. to hit the goal and base blocks)."""
+
+    def __init__(self, world, waypoints, speed=1., onFinish=None,
+                 entityId=0):
+        """Constructor. Returns a ScriptedPlayer object instance.
+
+        Keyword arguments:
+        world: the world (FakeWorld type object)
+        waypoints: list of (x, z) positions to walk through
+        speed: distance walked per step (tiles)
+        onFinish: function called at the end of the path
+        entityId: the entity id of the player
+        """
+        self._world = world
+        self._waypoints = list(waypoints)
+        self._speed = speed
+        self._onFinish = onFinish
+        self._entityId = entityId
+        self._pos = None            # exact (x, z) position
+        self._next = 0              # index of the next waypoint
+        self.steps = 0              # number of steps walked
+
+    def finished(self):
+        """Returns True if the end of the path has been reached."""
+        return self._next >= len(self._waypoints)
+
+    def step(self):
+        """Moves the player one step along the path."""
+        if self.finished():
+            return
+        if self._pos is None:
+            self._pos = self._waypoints[0]
+            self._next = 1
+        else:
+            # walk towards the next waypoint(s)
+            remaining = self._speed
+            x, z = self._pos
+            while remaining > 0 and not self.finished():
+                tx, tz = self._waypoints[self._next]
+                d = math.hypot(tx - x, tz - z)
+                if d <= remaining:
+                    x, z = tx, tz
+                    remaining -= d
+                    self._next += 1
+                else:
+                    x += (tx - x) * remaining / d
+                    z += (tz - z) * remaining / d
+                    remaining = 0
+            self._pos = (x, z)
+        self.steps += 1
+
+        # set the player tile position on the ground
+        x = math.floor(self._pos[0])
+        z = math.floor(self._pos[1])
+        self._world.setTilePos(x, self._world.getHeight(x, z), z,
+                               self._entityId)
+        if self.finished() and self._onFinish is not None:
+            self._onFinish()
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+
+# gameengine.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import concurrent.futures
+import math
+import time
+
+from pt3d import Pt3D
+from trajectory import baseDestroyedFlag, goalDestroyedFlag
+
+# Largest difference between the distance from a tile position and the
+# distance from the exact position (one tile along each axis)
+_tileMargin = math.sqrt(2)
+
+class GameEngine:
+    """A class running the MineField game loop on asyncio at a fixed tick rate.
+
+    The Minecraft calls are blocking, so they are executed one at a time on a
+    dedicated thread (the mcpi connection cannot be shared between threads)
+    while the event loop keeps running the other tasks. Several engines can
+    share an event loop and a pool of threads instead (see session.py): the
+    calls of each engine are then still made one at a time, in order. The
+    state of the next tick (player position and goal/base blocks state) is
+    fetched while the current tick is processed. The mine detector output and
+    the chat messages are handled by their own cooperative tasks.
+
+    With a maximum player speed, the tick rate adapts to the distance to the
+    nearest mine: the loop sleeps until the earliest time the player could get
+    to a distance where the detector level changes or a mine explodes, and
+    only runs at the full tick rate close to these distances.
+    """
+
+    def __init__(self, mc, mineDetector, proximityTracker, hitDetector, base,
+                 distMineTrigger, tickRate=20., explosion=None, clean=None,
+                 stats=None, recorder=None, executor=None,
+                 maxPlayerSpeed=None, maxTickInterval=.5):
+        """Constructor. Returns a GameEngine object instance.
+
+        Keyword arguments:
+        mc: the connection to Minecraft (BatchMinecraft type object)
+        mineDetector: the mine detector (MineDetector type object)
+        proximityTracker: the nearest mine distance tracker (ProximityTracker
+            type object)
+        hitDetector: the goal and base blocks destruction detector
+            (HitDetector type object, with targets [goal, base])
+        base: the base block position (Pt3D type object)
+        distMineTrigger: the distance under which a mine explodes
+        tickRate: the number of game loop iterations per second
+        explosion: function creating the explosion effect (blocking, called
+            on the Minecraft thread)
+        clean: function cleaning the game blocks (blocking, called on the
+            Minecraft thread)
+        stats: the game loop statistics collector (TickStats type object),
+            None to run without instrumentation
+        recorder: the player trajectory recorder (TrajectoryRecorder type
+            object), None to run without recording
+        executor: the pool of threads running the Minecraft calls, shared
+            with other engines (concurrent.futures.Executor type object),
+            None to run them on a dedicated thread
+        maxPlayerSpeed: the maximum horizontal speed of the player
+            (blocks/s), None to run at the fixed tick rate (also used if the
+            mine detector has no thresholds attribute)
+        maxTickInterval: the maximum time between two ticks when the tick
+            rate adapts to the distance to the nearest mine (s)
+        """
+        if tickRate <= 0:
+            raise ValueError("tickRate must be greater than 0.")
+        if maxPlayerSpeed is not None and maxPlayerSpeed <= 0:
+            raise ValueError("maxPlayerSpeed must be greater than 0.")
+        self._mc = mc
+        self._mineDetector = mineDetector
+        self._proximityTracker = proximityTracker
+        self._hitDetector = hitDetector
+        self._base = base
+        self._distMineTrigger = distMineTrigger
+        # squared, compared to the squared distance to the nearest mine
+        self._dist2MineTrigger = (distMineTrigger * distMineTrigger
+                                  if distMineTrigger >= 0 else -1)
+        self._period = 1 / tickRate
+        self._maxInterval = max(maxTickInterval, self._period)
+        # distances where the detector level changes or a mine explodes. The
+        # tick rate stays fixed if the detector levels distances are unknown,
+        # so that no level change is missed
+        thresholds = getattr(mineDetector, "thresholds", None)
+        if thresholds is None:
+            maxPlayerSpeed = None
+            thresholds = ()
+        self._maxSpeed = maxPlayerSpeed
+        self._levelDists = sorted(
+            d for d in tuple(thresholds) + (distMineTrigger,) if d >= 0)
+        # distance within which the nearest mine is searched when it is
+        # beyond the detection distance, far enough for the longest sleep
+        self._horizon = ((self._levelDists[-1] if self._levelDists else 0)
+                         + _tileMargin + (maxPlayerSpeed or 0)
+                         * self._maxInterval)
+        self._interval = self._period   # time between the last two ticks
+        self._explosion = explosion
+        self._clean = clean
+        self._stats = stats
+        self._recorder = recorder
+
+        self.alive = True           # is the player alive?
+        self.goalReached = False    # is the goal reached?
+        self.succeeded = False      # has the mission succeeded?
+        self.ticks = 0              # number of game loop iterations
+        self.playTime = 0.          # play time (s)
+        self.firstTickTime = None   # time of the first tick (perf_counter)
+
+        self._sharedExecutor = executor
+        self._executor = None       # thread(s) running the Minecraft calls
+        self._rpcLock = None        # orders the calls on a shared executor
+        self._chat = None           # queue of the messages to post
+        self._dist2Min = math.inf   # last squared distance to the nearest mine
+        self._detectorUpdate = None # event set when _dist2Min changes
+
+    ## Minecraft calls
+
+    def _rpc(self, func, *args):
+        """Schedules a blocking Minecraft call on the Minecraft thread and
+        returns an awaitable of its result."""
+        if self._stats is not None:
+            self._stats.count("rpc")
+        if self._rpcLock is not None:
+            # the task takes its turn in the order of the calls
+            return asyncio.ensure_future(self._serialRpc(func, args))
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, func, *args)
+
+    async def _serialRpc(self, func, args):
+        """Makes a blocking Minecraft call on the shared executor once the
+        previous calls of this engine are complete."""
+        async with self._rpcLock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    def _fetch(self):
+        """Returns the player position, the goal and base destroyed flags,
+        read in a single round trip to Minecraft (blocking), and the time of
+        the read (time.monotonic clock, taken before the request is sent)."""
+        stats = self._stats
+        if stats is not None:
+            t0 = time.perf_counter()
+        sampleTime = time.monotonic()
+        with self._mc.batch() as b:
+            p = b.getTilePos()
+            self._hitDetector.queue(b)
+            if stats is not None:
+                stats.count("fetchCalls", len(b))
+        p = p.result()
+        if stats is not None:
+            stats.add("fetch", time.perf_counter() - t0)
+        return (Pt3D(p.x, p.y, p.z), self._hitDetector.destroyed(),
+                sampleTime)
+
+    def postToChat(self, msg):
+        """Queues a message to be posted to the Minecraft chat."""
+        self._chat.put_nowait(msg)
+
+    ## Cooperative tasks
+
+    async def _chatTask(self):
+        """Posts the queued messages to the Minecraft chat."""
+        while True:
+            msg = await self._chat.get()
+            await self._rpc(self._mc.postToChat, msg)
+            self._chat.task_done()
+
+    async def _detectorTask(self):
+        """Displays the distance to the nearest mine on the mine detector when
+        it changes."""
+        while True:
+            await self._detectorUpdate.wait()
+            self._detectorUpdate.clear()
+            stats = self._stats
+            if stats is None:
+                self._mineDetector.onDist2(self._dist2Min)
+                continue
+            writes = getattr(self._mineDetector, "writes", 0)
+            t0 = time.perf_counter()
+            self._mineDetector.onDist2(self._dist2Min)
+            stats.add("detector", time.perf_counter() - t0)
+            stats.count("gpioWrites",
+                        getattr(self._mineDetector, "writes", 0) - writes)
+
+    async def _blink(self, value, freq, duration):
+        """Blinks the mine detector LEDs corresponding to a distance value.
+
+        Keyword arguments:
+        value: the distance value
+        freq: blink frequency (/s)
+        duration: blink duration (s)
+        """
+        for i in range(int(duration * freq)):
+            self._mineDetector.onValue(value)
+            await asyncio.sleep(1 / freq / 2)
+            self._mineDetector.off()
+            await asyncio.sleep(1 / freq / 2)
+
+    ## Game
+
+    def _nextInterval(self, pos, dist2Min, age=0.):
+        """Returns the time until the next tick: the tick period at a fixed
+        tick rate, otherwise the time the player needs at maximum speed to get
+        from position pos to a distance where the detector level changes or a
+        mine explodes, less the age of the position (at least the tick period,
+        at most maxTickInterval).
+
+        Keyword arguments:
+        pos: the player position (Pt3D type object)
+        dist2Min: the squared distance to the nearest mine (math.inf beyond
+            the detection distance)
+        age: the time elapsed since the position was read (s)
+        """
+        if self._maxSpeed is None or not self._levelDists:
+            return self._period
+        if dist2Min == math.inf:
+            # beyond the detection distance, search the nearest mine further
+            dist = self._proximityTracker.clearance(pos, self._horizon)
+        else:
+            dist = math.sqrt(dist2Min)
+        gap = min(abs(dist - d) for d in self._levelDists)
+        # the tiles positions differ from the player positions by up to one
+        # tile along each axis
+        interval = (gap - _tileMargin) / self._maxSpeed - age
+        return min(max(interval, self._period), self._maxInterval)
+
+    def _tick(self, pos, goalDestroyed, baseDestroyed):
+        """Updates the game state from the player position and the goal and
+        base blocks state."""
+        # squared distance to the nearest mine, displayed by the detector task
+        stats = self._stats
+        if stats is not None:
+            t0 = time.perf_counter()
+        dist2Min = self._proximityTracker.update2(pos)
+        if stats is not None:
+            stats.add("proximity", time.perf_counter() - t0)
+        if dist2Min != self._dist2Min:
+            self._dist2Min = dist2Min
+            self._detectorUpdate.set()
+
+        # if minimum distance is smaller than mine trigger distance...
+        if dist2Min <= self._dist2MineTrigger:
+            # the player is dead!
+            self.alive = False
+
+        # record the player trajectory
+        if self._recorder is not None:
+            self._recorder.record(pos.x, pos.y, pos.z, dist2Min,
+                                  goalDestroyed * goalDestroyedFlag
+                                  | baseDestroyed * baseDestroyedFlag)
+
+        # if the goal block has just been hit
+        if goalDestroyed and not self.goalReached:
+            self.goalReached = True
+            self.postToChat("Objective reached!")
+            self.postToChat("Now return to your starting point marked")
+            self.postToChat("by a red block and destroy the block")
+
+        # check if the base block has been hit
+        if baseDestroyed:
+            if self.goalReached:
+                # player has completed the mission
+                self.succeeded = True
+            else:
+                # player must first reach the goal, put back the base block
+                self.postToChat("You must fist find and destroy the block of gold")
+                from mcpi import block
+                return self._rpc(self._mc.setBlock, self._base.x, self._base.y,
+                                 self._base.z, block.GLOWING_OBSIDIAN)
+        return None
+
+    async def _gameLoop(self):
+        """Runs the game loop until the player is dead or has succeeded."""
+        loop = asyncio.get_running_loop()
+        nextTick = loop.time()
+        fetch = self._rpc(self._fetch)
+        stats = self._stats
+
+        while self.alive and not self.succeeded:
+            if stats is not None:
+                t0 = time.perf_counter()
+            pos, (goalDestroyed, baseDestroyed), sampleTime = await fetch
+            self.ticks += 1
+            if self.firstTickTime is None:
+                self.firstTickTime = time.perf_counter()
+            if stats is not None:
+                # time waiting for the prefetched state
+                t1 = time.perf_counter()
+                stats.add("fetchWait", t1 - t0)
+                stats.tick()
+
+            # fetch the state of the next tick while processing this one,
+            # unless the loop sleeps longer than the tick period
+            fetch = None
+            if self._interval <= self._period:
+                fetch = self._rpc(self._fetch)
+            reset = self._tick(pos, goalDestroyed, baseDestroyed)
+            if reset is not None:
+                # the prefetched state predates the base block reset
+                await reset
+                if fetch is not None:
+                    await fetch
+                fetch = self._rpc(self._fetch)
+            # the player may have moved since the position was read (up to a
+            # tick period earlier if prefetched)
+            self._interval = self._nextInterval(pos, self._dist2Min,
+                                                loop.time() - sampleTime)
+            if stats is not None:
+                stats.add("tick", time.perf_counter() - t1)
+
+            # wait for the next tick
+            nextTick += self._interval
+            delay = nextTick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # running late, do not try to catch up
+                nextTick = loop.time()
+
+            # read the state now if it was not prefetched, or if the
+            # prefetched state is stale after a long sleep
+            if fetch is None:
+                fetch = self._rpc(self._fetch)
+            elif self._interval > self._period:
+                await fetch
+                fetch = self._rpc(self._fetch)
+
+        # let the last fetch complete before the game ending calls
+        await fetch
+
+    async def _ending(self):
+        """Runs the end of game effects."""
+        # stop mine detector buzzer
+        self._mineDetector.buzzer.stop()
+
+        # case where the player is dead
+        if not self.alive:
+            if self._explosion is not None:
+                await self._rpc(self._explosion, 3)
+            self.postToChat("BOOM!!!")
+            self.postToChat(" ")
+            self.postToChat("Oh oh... Looks like you are dead!")
+            print("Player is dead - cleaning up game")
+            if self._clean is not None:
+                await self._rpc(self._clean)
+
+            # blink mine detector leds for a few seconds
+            await self._blink(0, 3, 6)
+
+        # case where the player has succeeded in completing the mission
+        else:
+            self.postToChat("Congratulations, you have successfully")
+            self.postToChat("finished your mission!")
+            self._mineDetector.off()
+
+            # display play time to Minecraft chat
+            minutes = str(int(self.playTime // 60))
+            seconds = str(int(self.playTime % 60))
+            self.postToChat("Time: " + minutes + "m " + seconds + "s")
+
+    async def run(self):
+        """Runs the game until it ends. Returns True if the mission succeeded,
+        False if the player is dead."""
+        if self._sharedExecutor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1)
+        else:
+            self._executor = self._sharedExecutor
+            self._rpcLock = asyncio.Lock()
+        self._chat = asyncio.Queue()
+        self._detectorUpdate = asyncio.Event()
+        tasks = [asyncio.create_task(self._chatTask()),
+                 asyncio.create_task(self._detectorTask())]
+        timeStart = time.time()
+        try:
+            await self._gameLoop()
+            self.playTime = time.time() - timeStart
+            await self._ending()
+            # post the remaining messages
+            await self._chat.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._sharedExecutor is None:
+                self._executor.shutdown(wait=True)
+        return self.succeeded
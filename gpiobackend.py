@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+# gpiobackend.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+################################################################################
+#
+# Output backends of the mine detector LEDs and buzzer. A backend drives a set
+# of GPIO output pins through two methods:
+#
+#   setup(pins)                 prepares the pins as outputs (off)
+#   write(setMask, clearMask)   turns on the pins of setMask and turns off the
+#                               pins of clearMask (bit n = GPIO pin n)
+#
+# The callers only write the pins that change.
+#
+################################################################################
+
+import mmap
+import os
+import struct
+import threading
+
+def _pins(mask):
+    """Returns the list of the pin numbers of the bits set in mask."""
+    pins = []
+    pin = 0
+    while mask:
+        if mask & 1:
+            pins.append(pin)
+        mask >>= 1
+        pin += 1
+    return pins
+
+class BackendPin:
+    """A class defining a single output pin of a backend, with the on/off
+    interface of the gpiozero LED and Buzzer classes. Only the state changes
+    are written to the backend."""
+
+    def __init__(self, backend, pin):
+        """Constructor. Returns a BackendPin object instance.
+
+        Keyword arguments:
+        backend: the output backend
+        pin: the GPIO pin number
+        """
+        self._backend = backend
+        self._mask = 1 << pin
+        self.pin = pin
+        self.is_lit = False
+        backend.setup([pin])
+
+    @property
+    def is_active(self):
+        """Returns True if the pin is on."""
+        return self.is_lit
+
+    def on(self):
+        """Turns the pin on."""
+        if not self.is_lit:
+            self.is_lit = True
+            self._backend.write(self._mask, 0)
+
+    def off(self):
+        """Turns the pin off."""
+        if self.is_lit:
+            self.is_lit = False
+            self._backend.write(0, self._mask)
+
+class GpiozeroBackend:
+    """A backend driving each pin with a gpiozero device (one GPIO call per pin
+    changed)."""
+
+    def __init__(self, deviceClass=None):
+        """Constructor. Returns a GpiozeroBackend object instance.
+
+        Keyword arguments:
+        deviceClass: class of the output devices, called with the pin number
+            (gpiozero LED by default, nullgpio.NullLED to run without GPIO)
+        """
+        if deviceClass is None:
+            from gpiozero import LED
+            deviceClass = LED
+        self._deviceClass = deviceClass
+        self.devices = {}           # pin -> output device
+
+    def setup(self, pins):
+        """Creates the output devices of a list of pins."""
+        for pin in pins:
+            if pin not in self.devices:
+                self.devices[pin] = self._deviceClass(pin)
+
+    def write(self, setMask, clearMask):
+        """Turns on the pins of setMask and turns off the pins of clearMask."""
+        for pin in _pins(setMask):
+            self.devices[pin].on()
+        for pin in _pins(clearMask):
+            self.devices[pin].off()
+
+class RecordingBackend:
+    """A backend recording the pin writes without any GPIO, to run the mine
+    detector off the Raspberry Pi (tests, simulations)."""
+
+    def __init__(self, record=True):
+        """Constructor. Returns a RecordingBackend object instance.
+
+        Keyword arguments:
+        record: keep the list of the writes in the log attribute (only the
+            state and counters are updated if False)
+        """
+        self._record = record
+        self.pins = set()           # pins set up
+        self.state = 0              # mask of the pins on
+        self.writes = 0             # number of write calls
+        self.pinWrites = 0          # number of pin changes written
+        self.log = []               # (setMask, clearMask) of the writes
+        self._lock = threading.Lock()   # writes from several threads
+
+    def setup(self, pins):
+        """Registers a list of output pins."""
+        self.pins.update(pins)
+
+    def write(self, setMask, clearMask):
+        """Turns on the pins of setMask and turns off the pins of clearMask."""
+        with self._lock:
+            self.state = (self.state | setMask) & ~clearMask
+            self.writes += 1
+            self.pinWrites += len(_pins(setMask | clearMask))
+            if self._record:
+                self.log.append((setMask, clearMask))
+
+    def isOn(self, pin):
+        """Returns True if a pin is on."""
+        return bool(self.state >> pin & 1)
+
+class RegisterBackend:
+    """A backend writing all the pin changes at once, as a pair of set and
+    clear bit masks (e.g. the GPSET0 and GPCLR0 registers of the Raspberry Pi):
+    a single write per update whatever the number of pins changed."""
+
+    def __init__(self, writer, setup=None):
+        """Constructor. Returns a RegisterBackend object instance.
+
+        Keyword arguments:
+        writer: function called with the (setMask, clearMask) of each write
+        setup: function called with the list of pins to set up as outputs
+        """
+        self._writer = writer
+        self._setup = setup
+
+    def setup(self, pins):
+        """Sets up a list of pins as outputs."""
+        if self._setup is not None:
+            self._setup(pins)
+
+    def write(self, setMask, clearMask):
+        """Turns on the pins of setMask and turns off the pins of clearMask."""
+        if setMask or clearMask:
+            self._writer(setMask, clearMask)
+
+    @classmethod
+    def gpiomem(cls, path="/dev/gpiomem"):
+        """Returns a RegisterBackend writing directly to the GPIO registers of
+        the BCM283x processors (Raspberry Pi 1 to 4) through /dev/gpiomem. The
+        set and clear registers only act on the bits written as 1, so the pin
+        writes need no read-modify-write."""
+        fd = os.open(path, os.O_RDWR | os.O_SYNC)
+        try:
+            regs = mmap.mmap(fd, 4096, mmap.MAP_SHARED,
+                             mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        gpset0 = 0x1c               # output set register (pins 0 to 31)
+        gpclr0 = 0x28               # output clear register (pins 0 to 31)
+
+        def setup(pins):
+            for pin in pins:
+                # function select: 3 bits per pin, 10 pins per register,
+                # 0b001 = output
+                offset = pin // 10 * 4
+                shift = pin % 10 * 3
+                fsel = struct.unpack_from("<I", regs, offset)[0]
+                fsel = fsel & ~(0b111 << shift) | (0b001 << shift)
+                struct.pack_into("<I", regs, gpclr0, 1 << pin)
+                struct.pack_into("<I", regs, offset, fsel)
+
+        def writer(setMask, clearMask):
+            if clearMask:
+                struct.pack_into("<I", regs, gpclr0, clearMask)
+            if setMask:
+                struct.pack_into("<I", regs, gpset0, setMask)
+
+        return cls(writer, setup)
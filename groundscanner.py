@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# groundscanner.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+
+# Block types the game blocks must not be placed on: water, lava and leaves
+unsuitableGround = (8, 9, 10, 11, 18)
+
+class GroundScanner:
+    """A class reading the ground height and the type of the ground block of
+    world columns, many columns at a time, and keeping them for later use.
+
+    The heights of a set of columns are read in a single batch of getHeight
+    queries, then the blocks under them in a single batch of getBlock queries:
+    scanning any number of columns costs two round trips to Minecraft.
+
+    If the connection caches the world (CachedMinecraft type object), the
+    columns are read through the cache, which also keeps them up to date with
+    the blocks written.
+    """
+
+    def __init__(self, mc):
+        """Constructor. Returns a GroundScanner object instance.
+
+        Keyword arguments:
+        mc: the connection to Minecraft (BatchMinecraft or CachedMinecraft
+            type object, or any object with getHeight and getBlock methods)
+        """
+        self._mc = mc
+        self._cached = hasattr(mc, "prefetchHeights")
+        self._heights = {}          # (x, z) -> ground height
+        self._grounds = {}          # (x, z) -> ground block type
+
+    def _query(self, calls):
+        """Executes a list of (method name, args) queries, in a batch if
+        available. Returns the list of the results."""
+        if hasattr(self._mc, "batch"):
+            with self._mc.batch() as b:
+                futures = [getattr(b, name)(*args) for name, args in calls]
+            return [f.result() for f in futures]
+        return [getattr(self._mc, name)(*args) for name, args in calls]
+
+    def scan(self, columns):
+        """Reads the ground height and block type of the columns not scanned
+        yet.
+
+        Keyword arguments:
+        columns: iterable of (x, z) column coordinates (floored)
+        """
+        columns = [(math.floor(x), math.floor(z)) for x, z in columns]
+        if self._cached:
+            # fill the cache in two round trips
+            self._mc.prefetchHeights(columns)
+            self._mc.prefetchBlocks([(x, self._mc.getHeight(x, z) - 1, z)
+                                     for x, z in columns])
+            return
+        columns = [c for c in dict.fromkeys(columns) if c not in self._heights]
+        if not columns:
+            return
+        heights = self._query([("getHeight", c) for c in columns])
+        grounds = self._query([("getBlock", (x, h - 1, z))
+                               for (x, z), h in zip(columns, heights)])
+        for c, h, g in zip(columns, heights, grounds):
+            self._heights[c] = h
+            self._grounds[c] = g
+
+    def height(self, x, z):
+        """Returns the ground height (y of the first air block) of column x, z.
+        """
+        if self._cached:
+            return self._mc.getHeight(x, z)
+        c = (math.floor(x), math.floor(z))
+        if c not in self._heights:
+            self.scan([c])
+        return self._heights[c]
+
+    def ground(self, x, z):
+        """Returns the type of the ground block of column x, z."""
+        if self._cached:
+            return self._mc.getBlock(x, self._mc.getHeight(x, z) - 1, z)
+        c = (math.floor(x), math.floor(z))
+        if c not in self._grounds:
+            self.scan([c])
+        return self._grounds[c]
+
+    def forget(self, x, z):
+        """Forgets the scanned height and ground of column x, z (e.g. after a
+        block is placed in it)."""
+        c = (math.floor(x), math.floor(z))
+        self._heights.pop(c, None)
+        self._grounds.pop(c, None)
+
+    def firstSuitable(self, candidates, unsuitable=unsuitableGround):
+        """Returns the first of a list of candidate positions (Pt3D type
+        objects) whose ground block is not of an unsuitable type, with its y
+        coordinate set to the ground height, or None if there is none. All the
+        candidates are scanned at once.
+
+        Keyword arguments:
+        candidates: list of candidate positions (Pt3D type objects)
+        unsuitable: the block types the position must not be on
+        """
+        self.scan([(c.x, c.z) for c in candidates])
+        for c in candidates:
+            if self.ground(c.x, c.z) not in unsuitable:
+                c.y = self.height(c.x, c.z)
+                return c
+        return None
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+# hardwareprocess.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+################################################################################
+#
+# Mine detector hardware driven by a separate process. The game process writes
+# the detector state into a small shared memory slot; a hardware process
+# (MineDetector and BuzzLevel) sleeps until the game signals a new state (a
+# semaphore released after each write), then reads the slot and applies the
+# state changes to the LEDs and buzzer. GPIO latency and the buzzer timing
+# never hold the game loop, which only packs the new state in memory.
+#
+# Layout of the slot (little-endian):
+#
+#   offset  size  content
+#   0       8     sequence counter (uint64), odd while the state is written
+#   8       4     detector level (int32, 0 to 4)
+#   12      4     buzzer active (int32, 0 or 1)
+#   16      4     stop request (int32, 0 or 1)
+#   20      8     blink frequency (float64, 0: no blinking)
+#
+# The slot is a seqlock with a single writer (the game): the reader retries
+# shortly while the counter is odd or changes during its read, so it never
+# applies a half written state.
+#
+################################################################################
+
+import multiprocessing
+import signal
+import struct
+import time
+from multiprocessing import shared_memory
+
+from minedetector import MineDetector, levelFromDist, levelFromDist2, \
+                         squaredThresholds
+
+_seq = struct.Struct("<Q")
+_state = struct.Struct("<iiid")
+_slotSize = 32
+_retryDelay = .0001                 # time before reading a slot being written
+
+def _hardwareMain(name, wakeup, thresholds, detectorFactory, checkInterval):
+    """Main function of the hardware process: applies the state of the shared
+    memory slot to a mine detector each time the game signals a change, until
+    a stop is requested or the game process ends.
+
+    Keyword arguments:
+    name: the name of the shared memory slot
+    wakeup: the semaphore released by the game after each write
+        (multiprocessing Semaphore type object)
+    thresholds: the (blue, green, yellow, red) distance thresholds
+    detectorFactory: function returning the mine detector, called with the
+        thresholds
+    checkInterval: the time between two checks that the game process is
+        alive (s)
+    """
+    # Ctrl-C is handled by the game, which stops this process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    slot = shared_memory.SharedMemory(name)
+    buf = slot.buf
+    parent = multiprocessing.parent_process()
+    detector = detectorFactory(*thresholds)
+    applied = (0, 1, 0, 0.)         # state of a new detector
+    try:
+        while True:
+            # sleep until a new state is written, ending with the game process
+            # if it was not stopped
+            if not wakeup.acquire(timeout=checkInterval):
+                if parent is not None and not parent.is_alive():
+                    break
+                continue
+            # the slot holds the last state: forget the earlier writes
+            while wakeup.acquire(False):
+                pass
+
+            # read a consistent state
+            while True:
+                seq = _seq.unpack_from(buf, 0)[0]
+                state = _state.unpack_from(buf, _seq.size)
+                if not seq & 1 and _seq.unpack_from(buf, 0)[0] == seq:
+                    break
+                time.sleep(_retryDelay)
+            level, buzzer, stop, freq = state
+            if stop:
+                break
+            if state != applied:
+                if buzzer != applied[1]:
+                    if buzzer:
+                        detector.buzzer.run()
+                    else:
+                        detector.buzzer.stop()
+                level = min(max(level, 0), 4)
+                if freq > 0:
+                    detector.blinkLevel(level, freq)
+                else:
+                    detector.blinkOff()
+                    detector.onLevel(level)
+                applied = state
+    finally:
+        detector.stop()
+        del buf
+        slot.close()
+
+class _BuzzerProxy:
+    """The buzzer of a DetectorProxy: stops and reactivates the buzzer of the
+    hardware process."""
+
+    def __init__(self, proxy):
+        """Constructor. Returns a _BuzzerProxy object instance.
+
+        Keyword arguments:
+        proxy: the detector proxy (DetectorProxy type object)
+        """
+        self._proxy = proxy
+
+    def run(self):
+        """Activates the buzzer."""
+        self._proxy._set(buzzer=1)
+
+    def stop(self):
+        """Stops the buzzer."""
+        self._proxy._set(buzzer=0)
+
+class DetectorProxy:
+    """A class replacing the MineDetector class in the game process, driving
+    a MineDetector running in a separate hardware process through a shared
+    memory slot. Each state change costs a few memory writes; unchanged states
+    are not written. The methods must be called from a single thread at a
+    time.
+    """
+
+    def __init__(self, threshBlue, threshGreen, threshYellow, threshRed,
+                 detectorFactory=MineDetector, checkInterval=1.):
+        """Constructor. Returns a DetectorProxy object and starts the hardware
+        process.
+
+        Keyword arguments:
+        threshBlue: the distance threshold under which the blue LED lights
+        threshGreen: the distance threshold under which the green LED lights
+        threshYellow: the distance threshold under which the yellow LED lights
+        threshRed: the distance threshold under which the red LED lights
+        detectorFactory: function returning the mine detector of the hardware
+            process, called with the thresholds (MineDetector by default; must
+            be picklable, e.g. functools.partial(MineDetector, backend=...))
+        checkInterval: the time between two checks by the hardware process
+            that the game process is alive (s)
+        """
+        self._thresholds = (threshBlue, threshGreen, threshYellow, threshRed)
+        self._thresholds2 = squaredThresholds(self._thresholds)
+        self._slot = shared_memory.SharedMemory(create=True, size=_slotSize)
+        self._buf = self._slot.buf
+        ctx = multiprocessing.get_context("spawn")
+        self._wakeup = ctx.Semaphore(0)
+        self._counter = 0
+        self.writes = 0             # number of states written
+        self._level = 0
+        self._buzzer = 1
+        self._freq = 0.
+        self._publish(0)
+        self.buzzer = _BuzzerProxy(self)
+        self._process = ctx.Process(target=_hardwareMain,
+                                    args=(self._slot.name, self._wakeup,
+                                          self._thresholds, detectorFactory,
+                                          checkInterval),
+                                    daemon=True)
+        self._process.start()
+
+    def _publish(self, stop):
+        """Writes the state into the slot (seqlock) and wakes the hardware
+        process up."""
+        if self._buf is None:       # stopped
+            return
+        self.writes += 1
+        self._counter += 1              # odd: state being written
+        _seq.pack_into(self._buf, 0, self._counter)
+        _state.pack_into(self._buf, _seq.size, self._level, self._buzzer,
+                         stop, self._freq)
+        self._counter += 1              # even: state complete
+        _seq.pack_into(self._buf, 0, self._counter)
+        self._wakeup.release()
+
+    def _set(self, level=None, buzzer=None, freq=None):
+        """Updates the state and writes it into the slot if it changed."""
+        state = (self._level, self._buzzer, self._freq)
+        if level is not None:
+            self._level = level
+        if buzzer is not None:
+            self._buzzer = buzzer
+        if freq is not None:
+            self._freq = freq
+        if (self._level, self._buzzer, self._freq) != state:
+            self._publish(0)
+
+    @property
+    def thresholds(self):
+        """Returns the (blue, green, yellow, red) distance thresholds."""
+        return self._thresholds
+
+    @property
+    def outputLevel(self):
+        """Returns the last level written (0 to 4)."""
+        return self._level
+
+    def level(self, value):
+        """Returns the level (number of LEDs lit, 0 to 4) for a distance value.
+        """
+        return levelFromDist(value, self._thresholds)
+
+    def onValue(self, value):
+        """Turn LEDs and buzzer on corresponding to a distance value."""
+        self._set(level=levelFromDist(value, self._thresholds), freq=0.)
+
+    def onDist2(self, dist2):
+        """Turn LEDs and buzzer on corresponding to a squared distance value."""
+        self._set(level=levelFromDist2(dist2, self._thresholds2), freq=0.)
+
+    def onLevel(self, level):
+        """Turn on the first level LEDs and the buzzer at that level."""
+        self._set(level=level, freq=0.)
+
+    def off(self):
+        """Turn all LEDs and buzzer off."""
+        self._set(level=0, freq=0.)
+
+    def blinkValue(self, value, freq):
+        """Blinks the LEDs corresponding to a distance value until blinkOff is
+        called."""
+        self._set(level=levelFromDist(value, self._thresholds), freq=freq)
+
+    def blinkLevel(self, level, freq):
+        """Blinks the first level LEDs until blinkOff is called."""
+        self._set(level=level, freq=freq)
+
+    def blinkOff(self):
+        """Stops the blinking and turns the LEDs off."""
+        if self._freq > 0:
+            self._set(level=0, freq=0.)
+
+    def stop(self, timeout=2.):
+        """Turns the LEDs and buzzer off, stops the hardware process and frees
+        the shared memory slot.
+
+        Keyword arguments:
+        timeout: the time to wait for the hardware process to stop (s), after
+            which it is terminated
+        """
+        if self._buf is None:
+            return
+        self._publish(1)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._buf = None
+        self._slot.close()
+        self._slot.unlink()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# hitdetector.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import time
+
+class HitDetector:
+    """A class detecting the destruction (block turned to air) of target blocks
+    such as the goal and base blocks. Two modes are available:
+
+    "poll": the target blocks are read with getBlock on every check.
+    "events": the block hit events of the server (mc.events.pollBlockHits) are
+        read on every check and only the targets matching a hit are read with
+        getBlock to confirm their destruction. Since Minecraft Pi only reports
+        hits made with a sword, the targets are also polled every pollInterval
+        seconds to notice blocks destroyed otherwise.
+
+    The detection queries are queued in a batch shared with the other queries
+    of the game loop (see mcbatch.Batch):
+
+        with mc.batch() as b:
+            hitDetector.queue(b)
+        goalDestroyed, baseDestroyed = hitDetector.destroyed()
+    """
+
+    def __init__(self, mc, targets, mode="poll", pollInterval=1.):
+        """Constructor. Returns a HitDetector object instance.
+
+        Keyword arguments:
+        mc: the connection to Minecraft (BatchMinecraft type object)
+        targets: list of the target block positions (Pt3D type objects)
+        mode: the detection mode, "poll" or "events"
+        pollInterval: time interval (s) between polls in "events" mode
+        """
+        if mode not in ("poll", "events"):
+            raise ValueError("mode must be 'poll' or 'events'.")
+        self._mc = mc
+        self._targets = list(targets)
+        self._mode = mode
+        self._pollInterval = pollInterval
+        self._lastPoll = time.time()
+        self._blockTypes = None     # futures of the target block types
+        self._hits = None           # future of the block hit events
+        if mode == "events":
+            # forget the hits made before the game started
+            mc.events.clearAll()
+
+    def queue(self, b):
+        """Queues the detection queries in a batch.
+
+        Keyword arguments:
+        b: the batch of the game loop queries (mcbatch.Batch type object)
+        """
+        now = time.time()
+        if self._mode == "poll" or now - self._lastPoll >= self._pollInterval:
+            self._lastPoll = now
+            self._blockTypes = [b.getBlock(t.x, t.y, t.z)
+                                for t in self._targets]
+        else:
+            self._blockTypes = None
+        if self._mode == "events":
+            self._hits = b.pollBlockHits()
+
+    def destroyed(self):
+        """Returns a list of booleans, True for each target found destroyed by
+        the queries of the last batch. Must be called after the batch has been
+        sent."""
+        # targets polled in this batch
+        if self._blockTypes is not None:
+            return [f.result() == 0 for f in self._blockTypes]
+
+        # targets hit since the last check
+        tiles = set((e.pos.x, e.pos.y, e.pos.z) for e in self._hits.result())
+        hit = [(math.floor(t.x), math.floor(t.y), math.floor(t.z)) in tiles
+               for t in self._targets]
+        if not any(hit):
+            return [False] * len(self._targets)
+
+        # confirm the destruction of the targets hit
+        with self._mc.batch() as b:
+            blockTypes = [b.getBlock(t.x, t.y, t.z) if h else None
+                          for t, h in zip(self._targets, hit)]
+        return [f is not None and f.result() == 0 for f in blockTypes]
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+# instrumentation.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import array
+import bisect
+import csv
+import json
+import math
+import signal
+import time
+
+class Histogram:
+    """A class defining a histogram of durations with fixed, logarithmically
+    spaced bins. Adding a sample only increments a counter (no memory is
+    allocated per sample); the percentiles are estimated from the bins (upper
+    bound of the bin, within 1 / binsPerDecade decade)."""
+
+    def __init__(self, lo=1e-6, hi=10., binsPerDecade=20):
+        """Constructor. Returns a Histogram object instance.
+
+        Keyword arguments:
+        lo: the upper bound of the first bin (s)
+        hi: the lower bound of the last bin (s)
+        binsPerDecade: the number of bins per decade between lo and hi
+        """
+        if not 0 < lo < hi:
+            raise ValueError("lo must be greater than 0 and smaller than hi.")
+        n = math.ceil(math.log10(hi / lo) * binsPerDecade)
+        self._bounds = [lo * 10**(i / binsPerDecade) for i in range(n + 1)]
+        self._counts = array.array("Q", bytes(8 * (n + 2)))
+        self.count = 0
+        self.total = 0.
+        self.min = math.inf
+        self.max = 0.
+
+    def add(self, value):
+        """Adds a sample."""
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Returns an estimate of the p-th percentile of the samples (the upper
+        bound of its bin, or the maximum), 0 if there are none.
+
+        Keyword arguments:
+        p: the percentile (0 to 100)
+        """
+        if self.count == 0:
+            return 0.
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self._counts):
+            seen += n
+            if seen >= rank and n:
+                if i < len(self._bounds):
+                    return min(self._bounds[i], self.max)
+                return self.max
+        return self.max
+
+    def summary(self):
+        """Returns a dictionnary of the statistics of the samples."""
+        return {"count": self.count,
+                "mean": self.total / self.count if self.count else 0.,
+                "min": self.min if self.count else 0.,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "max": self.max}
+
+class TickStats:
+    """A class collecting the game loop statistics: the durations of the
+    phases of the ticks (histograms), the interval between ticks and counters
+    (e.g. the Minecraft calls and the GPIO writes)."""
+
+    def __init__(self):
+        """Constructor. Returns a TickStats object instance."""
+        self.phases = {}            # phase name -> Histogram
+        self.counters = {}          # counter name -> count
+        self.ticks = 0
+        self._start = None          # time of the first tick
+        self._last = None           # time of the last tick
+
+    def tick(self):
+        """Counts a tick and records the interval since the previous one."""
+        now = time.perf_counter()
+        if self._last is None:
+            self._start = now
+        else:
+            self.add("interval", now - self._last)
+        self._last = now
+        self.ticks += 1
+
+    def add(self, phase, duration):
+        """Records the duration of a phase.
+
+        Keyword arguments:
+        phase: the name of the phase
+        duration: the duration (s)
+        """
+        hist = self.phases.get(phase)
+        if hist is None:
+            hist = self.phases[phase] = Histogram()
+        hist.add(duration)
+
+    def count(self, name, n=1):
+        """Increments a counter.
+
+        Keyword arguments:
+        name: the name of the counter
+        n: the increment
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """Returns a dictionnary of the statistics: number of ticks, duration,
+        tick rate, phases durations statistics and counters (total and per
+        tick)."""
+        duration = (self._last - self._start) if self.ticks > 1 else 0.
+        ticks = max(self.ticks, 1)
+        return {"ticks": self.ticks,
+                "duration": duration,
+                "tickRate": (self.ticks - 1) / duration if duration else 0.,
+                "phases": {name: hist.summary()
+                           for name, hist in sorted(self.phases.items())},
+                "counters": {name: {"total": n, "perTick": n / ticks}
+                             for name, n in sorted(self.counters.items())}}
+
+    def dump(self, path):
+        """Writes the summary to a file: CSV if the path ends with .csv (a row
+        for the ticks, then one row per phase and per counter), JSON
+        otherwise."""
+        summary = self.summary()
+        if not path.endswith(".csv"):
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+            return
+        columns = ["name", "count", "mean", "min", "p50", "p90", "p99", "max",
+                   "total", "perTick", "rate"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, columns)
+            writer.writeheader()
+            writer.writerow({"name": "ticks", "count": summary["ticks"],
+                             "total": summary["duration"],
+                             "rate": summary["tickRate"]})
+            for name, stats in summary["phases"].items():
+                writer.writerow(dict(stats, name=name))
+            for name, stats in summary["counters"].items():
+                writer.writerow(dict(stats, name=name))
+
+    def dumpOnSignal(self, path, signum=getattr(signal, "SIGUSR1", None)):
+        """Writes the summary to a file (see dump) each time the process
+        receives a signal (SIGUSR1 by default, e.g. kill -USR1 <pid>). Does
+        nothing if the signal is not available.
+
+        Keyword arguments:
+        path: the file path
+        signum: the signal number
+        """
+        if signum is not None:
+            signal.signal(signum, lambda signum, frame: self.dump(path))
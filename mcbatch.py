@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+# mcbatch.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from mcpi.connection import Connection, RequestError
+from mcpi.event import BlockEvent
+from mcpi.minecraft import Minecraft, intFloor
+from mcpi.util import flatten_parameters_to_bytestring
+from mcpi.vec3 import Vec3
+
+class Future:
+    """A class defining the result of a query queued in a Batch. The result is
+    available once the batch has been sent."""
+
+    def __init__(self, parse):
+        """Constructor. Returns a Future object instance.
+
+        Keyword arguments:
+        parse: function converting the reply string to the result value
+        """
+        self._parse = parse
+        self._done = False
+        self._value = None
+        self._error = None
+
+    @classmethod
+    def fromValue(cls, value):
+        """Returns a completed Future object holding a value."""
+        future = cls(None)
+        future._value = value
+        future._done = True
+        return future
+
+    def _setReply(self, reply):
+        """Sets the result from the reply string of the query."""
+        try:
+            self._value = self._parse(reply)
+        except ValueError as e:
+            self._error = e
+        self._done = True
+
+    def _setError(self, error):
+        """Sets the exception raised when the result is requested."""
+        self._error = error
+        self._done = True
+
+    def done(self):
+        """Returns True if the result is available."""
+        return self._done
+
+    def result(self):
+        """Returns the result of the query. Raises the query exception if the
+        query failed and a RuntimeError if the batch has not been sent yet."""
+        if not self._done:
+            raise RuntimeError("batch has not been sent yet.")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+def _parseBlockHits(s):
+    """Returns the list of BlockEvent objects of a block hits reply."""
+    events = [e for e in s.split("|") if e]
+    return [BlockEvent.Hit(*list(map(int, e.split(",")))) for e in events]
+
+class Batch:
+    """A class defining a batch of Minecraft Pi API calls. The calls are queued
+    and sent together in a single write to the connection socket, after which
+    the replies are read back in order. A batch of queries therefore costs a
+    single network round trip instead of one per query.
+
+    Query methods return Future objects, command methods (no reply) return
+    None. Use as a context manager to send the batch on exit:
+
+        with mc.batch() as b:
+            pos = b.getTilePos()
+            goalType = b.getBlock(goal.x, goal.y, goal.z)
+        print(pos.result(), goalType.result())
+    """
+
+    def __init__(self, conn):
+        """Constructor. Returns a Batch object instance.
+
+        Keyword arguments:
+        conn: the connection to Minecraft (mcpi Connection type object)
+        """
+        self._conn = conn
+        self._lines = []        # request lines to send
+        self._futures = []      # futures of the queries, in order
+
+    def __len__(self):
+        """Returns the number of calls queued in the batch."""
+        return len(self._lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        # only send the batch if the block completed normally
+        if excType is None:
+            self.send()
+        return False
+
+    def _queue(self, f, args, parse=None):
+        """Queues a call. Returns a Future if parse is defined (query) or None
+        (command)."""
+        self._lines.append(b"".join([f, b"(",
+                                     flatten_parameters_to_bytestring(args),
+                                     b")\n"]))
+        if parse is None:
+            return None
+        future = Future(parse)
+        self._futures.append((len(self._lines) - 1, future))
+        return future
+
+    def send(self):
+        """Sends all the queued calls in a single write and reads the replies
+        of the queries in order. Raises a RequestError after all the replies are
+        read if any query failed (the corresponding futures raise it too)."""
+        if not self._lines:
+            return
+        lines = self._lines
+        futures = self._futures
+        self._lines = []
+        self._futures = []
+
+        # clear stale data then send all the requests at once
+        self._conn.drain()
+        self._conn.lastSent = lines[-1]
+        self._conn.socket.sendall(b"".join(lines))
+
+        # read the replies through a single reader so that buffered replies
+        # are not lost between reads
+        reader = self._conn.socket.makefile("r")
+        firstError = None
+        try:
+            for i, future in futures:
+                reply = reader.readline()
+                if not reply:
+                    raise ConnectionError("connection closed by Minecraft.")
+                reply = reply.rstrip("\n")
+                if reply == Connection.RequestFailed:
+                    error = RequestError("%s failed" % lines[i].strip())
+                    future._setError(error)
+                    if firstError is None:
+                        firstError = error
+                else:
+                    future._setReply(reply)
+        finally:
+            reader.close()
+        if firstError is not None:
+            raise firstError
+
+    ## Queries
+
+    def getBlock(self, *args):
+        """Queues a get block query (x,y,z) => Future of id:int"""
+        return self._queue(b"world.getBlock", intFloor(args), int)
+
+    def getHeight(self, *args):
+        """Queues a get height query (x,z) => Future of int"""
+        return self._queue(b"world.getHeight", intFloor(args), int)
+
+    def getBlocks(self, *args):
+        """Queues a get cuboid of blocks query (x0,y0,z0,x1,y1,z1)
+        => Future of [id:int]"""
+        return self._queue(b"world.getBlocks", intFloor(args),
+                           lambda s: list(map(int, s.split(","))))
+
+    def getTilePos(self):
+        """Queues a get player tile position query => Future of Vec3"""
+        return self._queue(b"player.getTile", [],
+                           lambda s: Vec3(*map(int, s.split(","))))
+
+    def getEntityTilePos(self, id):
+        """Queues a get entity tile position query (entityId:int)
+        => Future of Vec3"""
+        return self._queue(b"entity.getTile", [id],
+                           lambda s: Vec3(*map(int, s.split(","))))
+
+    def pollBlockHits(self):
+        """Queues a block hits events query => Future of [BlockEvent]"""
+        return self._queue(b"events.block.hits", [], _parseBlockHits)
+
+    ## Commands
+
+    def setBlock(self, *args):
+        """Queues a set block command (x,y,z,id,[data])"""
+        self._queue(b"world.setBlock", intFloor(args))
+
+    def setBlocks(self, *args):
+        """Queues a set cuboid of blocks command (x0,y0,z0,x1,y1,z1,id,[data])"""
+        self._queue(b"world.setBlocks", intFloor(args))
+
+    def setTilePos(self, *args):
+        """Queues a set player tile position command (x,y,z)"""
+        self._queue(b"player.setTile", intFloor(args))
+
+    def postToChat(self, msg):
+        """Queues a post message to the game chat command"""
+        self._queue(b"chat.post", [msg])
+
+class BatchMinecraft:
+    """A class wrapping a connection to Minecraft Pi (mcpi Minecraft type
+    object) to add batched (pipelined) calls. All the attributes of the
+    wrapped object remain available so it can be used in its place."""
+
+    def __init__(self, mc):
+        """Constructor. Returns a BatchMinecraft object instance.
+
+        Keyword arguments:
+        mc: the connection to Minecraft (mcpi Minecraft type object)
+        """
+        self._mc = mc
+
+    def __getattr__(self, name):
+        # delegate everything else to the wrapped Minecraft object
+        return getattr(self._mc, name)
+
+    def batch(self):
+        """Returns a new, empty Batch object on the Minecraft connection."""
+        return Batch(self._mc.conn)
+
+    @staticmethod
+    def create(address="localhost", port=4711):
+        """Connects to Minecraft Pi and returns a BatchMinecraft object."""
+        return BatchMinecraft(Minecraft.create(address, port))
@@ -27,8 +27,54 @@
 
 import threading
 import time
-from gpiozero import LED
 from buzzlevel import BuzzLevel
+from gpiobackend import BackendPin, GpiozeroBackend
+from scheduler import Scheduler
+
+def squaredThresholds(thresholds):
+    """Returns the squares of a sequence of distance thresholds, for use with
+    levelFromDist2. Negative thresholds (never reached) stay negative.
+
+    Keyword arguments:
+    thresholds: the (blue, green, yellow, red) distance thresholds
+    """
+    return tuple(t * t if t >= 0 else -1 for t in thresholds)
+
+def levelFromDist(dist, thresholds):
+    """Returns the mine detector level (number of LEDs lit, 0 to 4) for a
+    distance to the nearest mine.
+
+    Keyword arguments:
+    dist: the distance to the nearest mine
+    thresholds: the (blue, green, yellow, red) distance thresholds, in
+        decreasing order
+    """
+    level = 0
+    for thresh in thresholds:   # climb the ladder until a threshold is missed
+        if dist > thresh:
+            break
+        level += 1
+    return level
+
+def levelFromDist2(dist2, thresholds2):
+    """Returns the mine detector level (number of LEDs lit, 0 to 4) for a
+    squared distance to the nearest mine, without taking its square root.
+
+    Keyword arguments:
+    dist2: the squared distance to the nearest mine
+    thresholds2: the squared (blue, green, yellow, red) distance thresholds,
+        in decreasing order (see squaredThresholds)
+    """
+    blue, green, yellow, red = thresholds2
+    if dist2 > blue:
+        return 0
+    if dist2 > green:
+        return 1
+    if dist2 > yellow:
+        return 2
+    if dist2 > red:
+        return 3
+    return 4
 
 class MineDetector:
     """A class defining a 4 LED scale (blue, green, yellow, red) that lights as
@@ -36,9 +82,16 @@ class MineDetector:
     Raspberry Pi to indicate the distance to the nearest mine. The class also
     controls a buzzer (BuzzLevel object type) that beeps a number of beeps
     corresponding to the number of LEDs lit.
+
+    The detector keeps the state of its outputs (mask of the LEDs lit and
+    buzzer level) and only writes the outputs that change, through an output
+    backend (see gpiobackend): gpiozero devices, a recording backend to run
+    off the Raspberry Pi or a batched register backend.
     """
 
-    def __init__(self, threshBlue, threshGreen, threshYellow, threshRed):
+    def __init__(self, threshBlue, threshGreen, threshYellow, threshRed,
+                 ledClass=None, buzzerClass=None, backend=None,
+                 scheduler=None):
         """Constructor. Returns a MineDetector object.
 
         Keyword arguments:
@@ -46,16 +99,75 @@ class MineDetector:
         threshGreen: the distance threshold under which the green LED lights
         threshYellow: the distance threshold under which the yellow LED lights
         threshRed: the distance threshold under which the red LED lights
+        ledClass: class of the LED devices, called with the pin number
+            (gpiozero LED by default, nullgpio.NullLED to run without GPIO)
+        buzzerClass: class of the buzzer device, passed to BuzzLevel
+        backend: the output backend of the LEDs and buzzer (see gpiobackend;
+            GpiozeroBackend of ledClass devices by default)
         """
+        if backend is None:
+            backend = GpiozeroBackend(ledClass)
+        elif buzzerClass is None:
+            # drive the buzzer through the backend too
+            buzzerClass = lambda pin: BackendPin(backend, pin)
         self._threshBlue = threshBlue
         self._threshGreen = threshGreen
         self._threshYellow = threshYellow
         self._threshRed = threshRed
-        self._ledBlue = LED(17)      # Blue LED on pin 17
-        self._ledGreen = LED(27)     # Green LED on pin 27
-        self._ledYellow = LED(22)    # Yellow LED on pin 22
-        self._ledRed = LED(16)       # Red LED on pin 16
-        self.buzzer = BuzzLevel()
+        self._thresholds = (threshBlue, threshGreen, threshYellow, threshRed)
+        self._thresholds2 = squaredThresholds(self._thresholds)
+        self._backend = backend
+        # Blue, green, yellow and red LEDs on pins 17, 27, 22 and 16
+        self._pins = (17, 27, 22, 16)
+        self._backend.setup(self._pins)
+        self._ledMasks = tuple(1 << pin for pin in self._pins)
+        # mask of the LEDs lit for each level
+        self._levelMasks = tuple(sum(self._ledMasks[:level])
+                                 for level in range(5))
+        self._mask = 0              # mask of the LEDs lit (off after setup)
+        self._level = 0             # buzzer level
+        self._outputLock = threading.Lock()
+        self.writes = 0             # number of writes to the backend
+        # single thread timing the buzzer beeps and the LEDs blinking
+        self._ownScheduler = scheduler is None
+        self.scheduler = Scheduler() if scheduler is None else scheduler
+        self.buzzer = BuzzLevel(buzzerClass, self.scheduler)
+        self._blink = 0             # blink run, incremented by blinkValue
+        self._blinkTimer = None     # next blink event
+        self._blinkLock = threading.Lock()
+
+    @property
+    def thresholds(self):
+        """Returns the (blue, green, yellow, red) distance thresholds."""
+        return self._thresholds
+
+    @property
+    def outputMask(self):
+        """Returns the bit mask (bit n = GPIO pin n) of the LEDs lit."""
+        return self._mask
+
+    @property
+    def outputLevel(self):
+        """Returns the current buzzer level (0 to 4)."""
+        return self._level
+
+    def _output(self, mask, level):
+        """Writes the LEDs and buzzer outputs, only where they change.
+
+        Keyword arguments:
+        mask: the bit mask of the LEDs to light
+        level: the buzzer level
+        """
+        # outputs also written by the blinking, on the scheduler thread
+        with self._outputLock:
+            if mask != self._mask:
+                # turn on the LEDs newly lit, turn off those no longer lit
+                self._backend.write(mask & ~self._mask, self._mask & ~mask)
+                self.writes += 1
+                self._mask = mask
+            if level != self._level:
+                self.buzzer.setLevel(level)    # set buzzer level
+                self._level = level
 
     def onValue(self, value):
         """Turn LEDs and buzzer on corresponding to a distance value.
@@ -64,62 +176,120 @@ class MineDetector:
         value: the distance value
         """
         level = 0   # Initialize buzzer level to 0
+        mask = 0    # Initialize the mask of the LEDs lit to 0
         if value <= self._threshBlue:   # if value is smaller than blue threshold
-            self._ledBlue.on()          # set blue LED to on
+            mask |= self._ledMasks[0]   # light blue LED
             level = 1                   # set level to 1
-        else:                           # if value is greater than blue threshold
-            self._ledBlue.off()         # set blue LED to off
         if value <= self._threshGreen:  # same for green LED...
-            self._ledGreen.on()
+            mask |= self._ledMasks[1]
             level = 2
-        else:
-            self._ledGreen.off()
         if value <= self._threshYellow: # and yellow LED...
-            self._ledYellow.on()
+            mask |= self._ledMasks[2]
             level = 3
-        else:
-            self._ledYellow.off()
         if value <= self._threshRed:    # red LED.
-            self._ledRed.on()
+            mask |= self._ledMasks[3]
             level = 4
-        else:
-            self._ledRed.off()
-        self.buzzer.setLevel(level)    # set buzzer level
+        self._output(mask, level)   # write the LEDs and buzzer that changed
+
+    def level(self, value):
+        """Returns the level (number of LEDs lit, 0 to 4) for a distance value.
+        """
+        return levelFromDist(value, self._thresholds)
+
+    def onDist2(self, dist2):
+        """Turn LEDs and buzzer on corresponding to a squared distance value,
+        without taking its square root.
+
+        Keyword arguments:
+        dist2: the squared distance value
+        """
+        self.onLevel(levelFromDist2(dist2, self._thresholds2))
+
+    def onLevel(self, level):
+        """Turn on the first level LEDs (blue, green, yellow, red) and the
+        buzzer at that level.
+
+        Keyword arguments:
+        level: the number of LEDs to light (0 to 4)
+        """
+        self._output(self._levelMasks[level], level)
 
     def off(self):
         """Turn all LEDs and buzzer off."""
-        self._ledBlue.off()
-        self._ledGreen.off()
-        self._ledYellow.off()
-        self._ledRed.off()
-        self.buzzer.setLevel(0)    # set buzzer level to 0 (off)
+        self._output(0, 0)
 
-    def _blinkValue(self, value, freq):
-        """Blink LEDs corresponding to a distance value.
+    def _blinkStep(self, blink, deadline, show, arg, halfPeriod, on):
+        """Turns the LEDs on (or off) for a blink half period and schedules
+        the next half period.
 
         Keyword arguments:
-        value: the distance value
-        freq: blink frequency (/s)
+        blink: the blink run of the event (events of a cancelled blink are
+            ignored)
+        deadline: the time of the event (time.monotonic clock)
+        show: the method turning the LEDs on (onValue or onLevel)
+        arg: the argument of the show method
+        halfPeriod: the blink half period (s)
+        on: turn the LEDs on if True, off if False
+        """
+        with self._blinkLock:
+            if blink != self._blink:
+                return
+            if on:
+                show(arg)               # turn LEDs on
+            else:
+                self.off()              # turn LEDs off
+            deadline += halfPeriod
+            self._blinkTimer = self.scheduler.scheduleAt(
+                deadline, self._blinkStep, blink, deadline, show, arg,
+                halfPeriod, not on)
+
+    def _startBlink(self, show, arg, freq):
+        """Starts blinking the LEDs turned on by show(arg) at a frequency freq.
         """
-        self._blink = True   # set _blink attribute to True
-        while self._blink:   # blink as long as blink attribute is True
-            self.onValue(value)         # turn LEDs on
-            time.sleep(1 / freq / 2)    # sleep
-            self.off()                  # turn LEDs off
-            time.sleep(1 / freq / 2)    # sleep
+        self.blinkOff()
+        with self._blinkLock:
+            self._blink += 1        # new blink run
+            now = time.monotonic()
+            self._blinkTimer = self.scheduler.scheduleAt(
+                now, self._blinkStep, self._blink, now, show, arg,
+                1 / freq / 2, True)
 
     def blinkValue(self, value, freq):
-        """Launches _blinkValue method in a dedicated thread so it can run in
-        the background while the calling program continues.
+        """Blinks the LEDs corresponding to a distance value in the background
+        (on the scheduler thread) while the calling program continues, until
+        blinkOff is called.
 
         Keyword arguments:
         value: the distance value
         freq: blink frequency (/s)
         """
-        thread1 = threading.Thread(target = self._blinkValue, args = (value, freq))
-        thread1.start()
+        self._startBlink(self.onValue, value, freq)
+
+    def blinkLevel(self, level, freq):
+        """Blinks the first level LEDs in the background until blinkOff is
+        called (see blinkValue).
+
+        Keyword arguments:
+        level: the number of LEDs to blink (0 to 4)
+        freq: blink frequency (/s)
+        """
+        self._startBlink(self.onLevel, level, freq)
 
     def blinkOff(self):
-        """Sets the _blink attribute to False. The background thread will stop
-        automatically at the end of the current loop."""
-        self._blink = False
+        """Stops the blinking immediately and turns the LEDs off."""
+        with self._blinkLock:
+            if self._blinkTimer is None:
+                return
+            self._blink += 1        # ignore the events of the blink run
+            self.scheduler.cancel(self._blinkTimer)
+            self._blinkTimer = None
+            self.off()
+
+    def stop(self):
+        """Turns the LEDs and buzzer off and stops the scheduler thread (unless
+        the scheduler was given to the constructor)."""
+        self.blinkOff()
+        self.buzzer.stop()
+        self.off()
+        if self._ownScheduler:
+            self.scheduler.stop()
@@ -34,28 +34,64 @@
 #
 ################################################################################
 
+import ast
+import asyncio
+import concurrent.futures
 import random
-import time
 import math
+import sys
+import time
 
-from mcpi.minecraft import Minecraft
-from mcpi import block
+import numpy as np
 
+from blockbuffer import BlockWriteBuffer
+from chunkedminefield import ChunkedMineField
+from dangermap import DangerMap
+from groundscanner import GroundScanner
+from instrumentation import TickStats
 from minedetector import MineDetector
+from minefieldfile import loadMineField
+from mineindex import PackedMineIndex
+from mineplacement import placeMines
+from proximitytracker import ProximityTracker
 from pt3d import Pt3D
+from worldcache import CachedMinecraft
 
 ########################################
 ### Functions
 
-def clean():
+def connect(address="localhost", port=4711):
+    """Connects to Minecraft Pi and returns the connection, with batched calls
+    support and a cache of the world height and blocks (CachedMinecraft type
+    object). The mcpi package is imported on the first connection."""
+    from mcbatch import BatchMinecraft
+    return CachedMinecraft(BatchMinecraft.create(address, port))
+
+def createDetector(config):
+    """Returns the mine detector of a game (MineDetector type object, or
+    DetectorProxy type object if config.hardwareProcess is True). The gpiozero
+    package, or the hardware process, is only loaded here.
+
+    Keyword arguments:
+    config: the game settings (GameConfig type object)
+    """
+    if config.hardwareProcess:
+        from hardwareprocess import DetectorProxy
+        return DetectorProxy(*config.thresholds)
+    return MineDetector(*config.thresholds)
+
+def clean(mc, base, goal):
     """Cleans the game blocks in case of interruption."""
+    from mcpi import block
 
-    # set base and goal blocks to air
-    mc.setBlock(base.x, base.y, base.z, block.AIR)
-    mc.setBlock(goal.x, goal.y, goal.z, block.AIR)
+    # set base and goal blocks to air (sent in one burst)
+    with BlockWriteBuffer(mc) as buf:
+        buf.setBlock(base.x, base.y, base.z, block.AIR)
+        buf.setBlock(goal.x, goal.y, goal.z, block.AIR)
 
-def explosion(dim):
+def explosion(mc, dim):
     """Create an explosion effect at the player position."""
+    from mcpi import block
     # get the player position
     p = mc.player.getTilePos()
 
@@ -64,13 +100,17 @@ def explosion(dim):
     d2 = d3 - 1
     d1 = d2 - 1
 
+    # buffer the explosion blocks so that they are merged into a few cuboids
+    # and sent in one burst
+    buf = BlockWriteBuffer(mc)
+
     # create a hole at the player position
-    mc.setBlocks(p.x - d2, p.y - d1, p.z - d1, p.x + d2, p.y + d1, p.z + d1,
-                 block.AIR)
-    mc.setBlocks(p.x - d1, p.y - d1, p.z - d2, p.x + d1, p.y + d1, p.z + d2,
-                 block.AIR)
-    mc.setBlocks(p.x - d1, p.y - d2, p.z - d1, p.x + d1, p.y + d2, p.z + d1,
-                 block.AIR)
+    buf.setBlocks(p.x - d2, p.y - d1, p.z - d1, p.x + d2, p.y + d1, p.z + d1,
+                  block.AIR)
+    buf.setBlocks(p.x - d1, p.y - d1, p.z - d2, p.x + d1, p.y + d1, p.z + d2,
+                  block.AIR)
+    buf.setBlocks(p.x - d1, p.y - d2, p.z - d1, p.x + d1, p.y + d2, p.z + d1,
+                  block.AIR)
 
     # create falling gravel and sand blocks above player.
     for i in range(-d3, d3):
@@ -79,39 +119,211 @@ def explosion(dim):
             rand2 = random.randint(0, 1)
             if rand1 > 0:
                 if rand2 > 0:
-                    mc.setBlock(p.x + i, p.y + d3, p.z + j, block.GRAVEL)
+                    buf.setBlock(p.x + i, p.y + d3, p.z + j, block.GRAVEL)
                 else:
-                    mc.setBlock(p.x + i, p.y + d3, p.z + j, block.SAND)
+                    buf.setBlock(p.x + i, p.y + d3, p.z + j, block.SAND)
+
+    # send the explosion blocks to Minecraft
+    buf.flush()
 
-def popMines(mines, point, distance):
-    """Removes mines located within a specidfied distance around a point from
-    the mines list.
+def popMines(mines, points, distance):
+    """Removes mines located within a specidfied distance around any of a list
+    of points from the mines array. Returns a tuple of the array of remaining
+    mines and the array of removed mines.
     """
-    # list of the indexes of mines in proximity of the point (initially empty)
-    minesProx = []
+    # mask of the mines in proximity of any of the points
+    minesProx = np.zeros(len(mines), dtype=bool)
+    for point in points:
+        minesProx |= mines.maskWithin(point, distance)
 
-    # for all mines,
-    for i in range(len(mines)):
+    # print number of mines eliminated
+    print("   ", int(minesProx.sum()), " Mines eliminated.")
+    # split the mines array in a single pass
+    return mines.select(~minesProx), mines.select(minesProx)
+
+def placeBase(mc, scanner=None, nbCandidates=16, rng=None):
+    """Returns a random base position (Pt3D type object) on the ground, not on
+    water, lava or a tree. The candidate positions are evaluated nbCandidates
+    at a time with a GroundScanner (created if not specified). The positions
+    are drawn from rng (random.Random type object, the global generator of
+    the random module by default)."""
+    if scanner is None:
+        scanner = GroundScanner(mc)
+    if rng is None:
+        rng = random
+
+    # Try batches of base block positions until an acceptable position is found
+    base = None
+    while base is None:
+
+        # define random points (Pt3D type) within +/- 35 blocks of world origin
+        candidates = [Pt3D(rng.randint(-35, 35), 0, rng.randint(-35, 35))
+                      for i in range(nbCandidates)]
+
+        # scan them with the columns next to them, where the player spawns
+        scanner.scan([(c.x, c.z) for c in candidates] +
+                     [(c.x + 1, c.z) for c in candidates])
+
+        # keep the first one not on water, lava or a tree (with its height)
+        base = scanner.firstSuitable(candidates)
+
+    return base
+
+def generateMines(base, nbMines, extentMines, safeZones=(), minSpacing=1,
+                  rng=None):
+    """Returns an array of mines (PointArray object) at random locations
+    around the base, at least minSpacing apart and outside of the safe zones
+    (list of (point, radius) tuples). The random generator is seeded from rng
+    (random.Random type object), or from the NumPy global random state if rng
+    is None."""
+    if rng is None:
+        seed = np.random.randint(2**32, dtype=np.uint64)
+    else:
+        seed = rng.getrandbits(32)
+    gen = np.random.default_rng(seed)
+    return placeMines(base, nbMines, extentMines, minSpacing, safeZones, gen)
+
+def placeGoal(mc, base, goalDist, scanner=None, nbCandidates=16, rng=None):
+    """Returns a random goal position (Pt3D type object) on the ground at goal
+    distance from the base, not on water, lava or a tree. The candidate
+    positions are evaluated nbCandidates at a time with a GroundScanner
+    (created if not specified). The positions are drawn from rng
+    (random.Random type object, the global generator of the random module by
+    default)."""
+    if scanner is None:
+        scanner = GroundScanner(mc)
+    if rng is None:
+        rng = random
+
+    # Try batches of goal block positions until an acceptable position is found
+    goal = None
+    while goal is None:
+
+        # set the azimuts to the goal randomly between -180 and 180 degrees
+        goalAzimuts = [rng.uniform(-math.pi, math.pi)
+                       for i in range(nbCandidates)]
+
+        # define points (Pt3D type) at goal distance and goal azimut from base
+        candidates = [Pt3D(goalDist * math.cos(a) + base.x, 0,
+                           goalDist * math.sin(a) + base.z)
+                      for a in goalAzimuts]
+
+        # keep the first one not on water, lava or a tree (with its height)
+        goal = scanner.firstSuitable(candidates)
+
+    return goal
+
+def prepareMineField(mc, nbMines, extentMines, goalDist, distBlue,
+                     distMineTrigger, useDangerMap=True, chunked=False,
+                     minSpacing=1, scanner=None, rng=None):
+    """Defines the base and goal locations and generates the mines. Returns a
+    tuple of the base and goal positions (Pt3D type objects), the mines array
+    (PointArray type object, or ChunkedMineField type object if chunked is
+    True) and the nearest mine distance tracker (ProximityTracker type
+    object). The ground scanner (GroundScanner type object) keeps the ground
+    of the columns evaluated for later use. The random draws are made from
+    rng (random.Random type object), or from the global generators of the
+    random module and NumPy if rng is None."""
+    if scanner is None:
+        scanner = GroundScanner(mc)
+
+    ## Random definition of the base location
+    print("Defining the base location")
+    base = placeBase(mc, scanner, rng=rng)
+    print("   Base position defined successfully.")
+
+    if chunked:
+        return prepareChunkedMineField(mc, base, nbMines, extentMines,
+                                       goalDist, distBlue, distMineTrigger,
+                                       scanner, rng)
+
+    ## Define goal position (position relative to base location)
+    print("Défining the goal location")
+    goal = placeGoal(mc, base, goalDist, scanner, rng=rng)
+    print("   Goal position defined successfully")
+
+    ## Random generation of mines, none within trigger distance of base and
+    ## goal locations
+    print("Generating mines")
+    mines = generateMines(base, nbMines, extentMines,
+                          [(base, distMineTrigger + 1),
+                           (goal, distMineTrigger + 1)], minSpacing, rng)
+
+    proximityTracker = trackMines(mines, base, extentMines, distBlue,
+                                  useDangerMap)
+
+    return base, goal, mines, proximityTracker
+
+def trackMines(mines, base, extentMines, distBlue, useDangerMap=True):
+    """Returns the nearest mine distance tracker (ProximityTracker type object)
+    of an array of mines (PointArray type object)."""
+
+    # Store the mines in a compact spatial index sized on the largest detection
+    # distance
+    mineIndex = PackedMineIndex(mines.coords, distBlue)
+
+    # Precompute the distance to the nearest mine over the mine field area
+    if useDangerMap:
+        print("Computing the danger map")
+        dangerMap = DangerMap(mines, base, extentMines, distBlue)
+    else:
+        dangerMap = None
+
+    # Track the distance to the nearest mine as the player moves
+    return ProximityTracker(mineIndex, distBlue, dangerMap=dangerMap)
+
+def prepareSavedMineField(mc, path, distBlue, useDangerMap=True, scanner=None):
+    """Loads the base and goal locations and the mines from a mine field file.
+    Returns the same tuple as prepareMineField."""
+    if scanner is None:
+        scanner = GroundScanner(mc)
+    print("Loading the mine field")
+    layout = loadMineField(path)
+    base = layout.base
+    goal = layout.goal
+
+    # the height of the blocks may differ from the world the file was saved in
+    scanner.scan([(base.x, base.z), (goal.x, goal.z)])
+    base.y = scanner.height(base.x, base.z)
+    goal.y = scanner.height(goal.x, goal.z)
+    print("   ", len(layout), " Mines loaded.")
+
+    mines = layout.mines()
+    if len(mines):
+        extentMines = int(np.abs(layout.xz - [base.x, base.z]).max()) + 1
+    else:
+        extentMines = 0
+    proximityTracker = trackMines(mines, base, extentMines, distBlue,
+                                  useDangerMap)
 
-         # calculate distance to mine
-        distMine = point.distAxes(mines[i], 5)
+    return base, goal, mines, proximityTracker
 
-        # if mine is within specified distance
-        if distMine <= distance:
-            # add mine index to proximity list
-            minesProx.append(i)
+def prepareChunkedMineField(mc, base, nbMines, extentMines, goalDist, distBlue,
+                            distMineTrigger, scanner=None, rng=None):
+    """Defines the goal location and an unbounded mine field with the mine
+    density of nbMines mines over the mines extent. The mines are generated
+    around the player as it moves. Returns the same tuple as prepareMineField.
+    """
+    if rng is None:
+        rng = random
+    ## Mine field generated on demand, seeded randomly
+    print("Defining the mine field")
+    density = nbMines / (2 * extentMines + 1)**2
+    mines = ChunkedMineField(density, rng.getrandbits(32))
 
-    # if there are mines in the proximity list
-    if len(minesProx) > 0:
-        # for all mine indexes in proximity list
-        for i in minesProx:
-            # remove mine from mines list
-            mines.pop(i)
+    ## Define goal position (position relative to base location)
+    print("Défining the goal location")
+    goal = placeGoal(mc, base, goalDist, scanner, rng=rng)
+    print("   Goal position defined successfully")
 
-    # print number of mines eliminated
-    print("   ", len(minesProx), " Mines eliminated.")
-    # return mines list
-    return mines
+    # Clear the mines within trigger distance of base and goal locations
+    mines.removeWithin(base, distMineTrigger + 1)
+    mines.removeWithin(goal, distMineTrigger + 1)
+
+    # Track the distance to the nearest mine as the player moves
+    proximityTracker = ProximityTracker(mines, distBlue)
+
+    return base, goal, mines, proximityTracker
 
 ########################################
 ### Game settings
@@ -132,240 +344,230 @@ nbMines = 200
 # Extent of mine coverage around player (+/-)
 extentMines = 100
 
+# Minimum distance between two mines (1: at most one mine per block)
+minMineSpacing = 1
+
 # Distance to goal
 goalDist = 40
 
-########################################
-### Game preparation
-
-# Initialization of the mine detector
-mineDetector = MineDetector(distBlue, distGreen, distYellow, distRed)
-
-# Connection to Minecraft Pi
-mc = Minecraft.create()
-
-## Random definition of the base location
-print("Defining the base location")
-
-# State variable defining whether the base block has been successfully defined
-blockBaseOK = False
-
-# Try base block positions until an acceptable position is found
-while not blockBaseOK:
-
-    # define a random point (Pt3D type) within +/- 35 blocks of world origin
-    base = Pt3D(random.randint(-35, 35), 0, random.randint(-35, 35))
-
-    # get world height at base position
-    base.y = mc.getHeight(base.x, base.z)
-
-    # get the block type under base position
-    blockBaseType = mc.getBlock(base.x, base.y - 1, base.z)
-
-    # check that block type not is water, lava or a tree
-    if not blockBaseType in [8, 9, 10, 11, 18]:
-        # base position is acceptable
-        blockBaseOK = True
-
-print("   Base position defined successfully.")
-
-## Random generation of mines
-
-print("Generating mines")
-
-# List of mines (Pt3D objects, initially empty)
-mines = []
-
-# Do for each mine
-for mine in range(nbMines):
-    # create Pt3D type object at random location
-    # and append it to the mines list.
-    mines.append(Pt3D(random.randint(-extentMines, extentMines) + base.x, -64,
-                 random.randint(-extentMines, extentMines) + base.z))
-
-# Check and remove mines within trigger distance of base location
-print("Verifying mines at start position")
-mines = popMines(mines, base, distMineTrigger + 1)
-
-## Define goal position (position relative to base location)
-
-print("Défining the goal location")
-
-# State variable defining whether the goal block has been successfully defined
-blockGoalOK = False
-
-# Try goal block positions until an acceptable position is found
-while not blockGoalOK:
-
-    # set the azimut to the goal randomly between -180 and 180 degrees
-    goalAzimut = random.uniform(-math.pi, math.pi)
-
-    # define a point (Pt3D type) at goal distance and goal azimut from base
-    goal = Pt3D(goalDist * math.cos(goalAzimut) + base.x, 0,
-                goalDist * math.sin(goalAzimut) + base.z)
-
-    # get world height at goal position
-    goal.y = mc.getHeight(goal.x, goal.z)
-
-    # get the block type under goal position
-    blockGoalType = mc.getBlock(goal.x, goal.y - 1, goal.z)
-
-    # check that block type not is water, lava or a tree
-    if not blockGoalType in [8, 9, 10, 11, 18]:
-        # goal position is acceptable
-        blockGoalOK = True
-
-print("   Goal position defined successfully")
-
-# Check and remove mines within trigger distance of base location
-print("Verifying mines at goal position")
-mines = popMines(mines, goal, distMineTrigger + 1)
-
-# Create a glowing obsidian block at base position
-mc.setBlock(base.x, base.y, base.z, block.GLOWING_OBSIDIAN)
-
-# Create a gold block at goal position
-mc.setBlock(goal.x, goal.y, goal.z, block.GOLD_BLOCK)
-
-# Set player position next to base block
-mc.player.setTilePos(base.x + 1, mc.getHeight(base.x + 1, base.z), base.z)
+# Generate the mines on demand around the player instead of all at once: the
+# mine field is unbounded (with the density of nbMines over extentMines) and
+# the startup time does not depend on its size
+chunkedField = False
+
+# Precompute the distance to the nearest mine for every tile of the mine field
+# (faster game loop on large mine fields at the cost of some startup time)
+useDangerMap = True
+
+# Detection of the goal and base blocks destruction: "poll" reads the blocks on
+# every loop, "events" relies on the block hit events (sword hits) and only
+# reads the blocks to confirm a hit or once per second
+hitDetection = "poll"
+
+# Number of game loop iterations per second
+tickRate = 20
+
+# Maximum horizontal speed of the player (blocks/s, flying in creative mode).
+# Far from the mines, the game loop sleeps until the player could get to a
+# distance where the mine detector level changes or a mine explodes, up to
+# maxTickInterval seconds, and only runs at the full tick rate close to these
+# distances (None: always run at the full tick rate)
+maxPlayerSpeed = 11
+maxTickInterval = .5
+
+# Seed of the random mine field generation (None: different every game)
+seed = None
+
+# Mine field file: if the file exists, the mine field is loaded from it,
+# otherwise the generated mine field is saved to it (None: no file)
+mineFieldFile = None
+
+# Drive the mine detector LEDs and buzzer from a separate process, so that the
+# GPIO writes and the buzzer timing never delay the game loop
+hardwareProcess = False
+
+# Game loop statistics file: if set, the durations of the game loop phases and
+# the numbers of Minecraft calls and GPIO writes are collected and written to
+# this file (JSON, or CSV if the name ends with .csv) at the end of the game
+# and when the process receives the USR1 signal (None: no statistics)
+statsFile = None
+
+# Player trajectory file: if set, the player position, the distance to the
+# nearest mine and the detector level of each tick are recorded to this file,
+# to be replayed offline with trajectory.py. The mine field is saved along
+# (to mineFieldFile, or to the trajectory file name with the .mfld extension)
+# (None: no recording)
+trajectoryFile = None
+
+# Address and port of the Minecraft Pi game to connect to
+address = "localhost"
+port = 4711
 
 ########################################
-### Start game
-
-## Initialize game state variables
-# Is the player alive?
-alive = True
-
-# Is the goal reached?
-goalReached = False
-
-# Has the mission succeeded?
-succeeded = False
-
-# Post player instructions in Minecraft window
-mc.postToChat("Find and destroy the block of gold")
-mc.postToChat("Beware of the mines!!!")
-mc.postToChat("Use your mine detector to avoid mines")
-
-print("Game start")
-
-# Store game start time
-timeStart = time.time()
-
-try:
-    # Main game loop. Runs as long as player is alive and has not succeeded
-    while alive and not succeeded:
-
-        # get player position
-        p = mc.player.getTilePos()
-
-        # store player position in a Pt3D type object
-        pos = Pt3D(p.x, p.y, p.z)
-
-        ## Calculate distance to the nearest mine
-        # set initial min distance to a large value
-        distMin = 1000000.
-
-        # do for each mine
-        for mine in mines:
-            # calculate distance to mine in horizontal plane
-            dist = pos.distAxes(mine, 5)
-
-            # if distance to mine is smaller than current min distance
-            if dist < distMin:
-                # set distance as new minimum distance
-                distMin = dist
-
-        # display minimum distance on mine detector (LEDs and buzzer)
-        mineDetector.onValue(distMin)
-
-        # if minimum distance is smaller than mine trigger distance...
-        if distMin <= distMineTrigger:
-            # the player is dead!
-            alive = False
+### Game configuration
+
+class GameConfig:
+    """A class defining the settings of a game. The settings are initialized
+    with the game settings above, except those given as keyword arguments to
+    the constructor."""
+
+    # names of the settings
+    names = ("distBlue", "distGreen", "distYellow", "distRed",
+             "distMineTrigger", "nbMines", "extentMines", "minMineSpacing",
+             "goalDist", "chunkedField", "useDangerMap", "hitDetection",
+             "tickRate", "maxPlayerSpeed", "maxTickInterval", "seed",
+             "mineFieldFile", "hardwareProcess", "statsFile",
+             "trajectoryFile", "address", "port")
+
+    def __init__(self, **settings):
+        """Constructor. Returns a GameConfig object instance. Raises a
+        ValueError if a setting name is unknown.
+
+        Keyword arguments:
+        settings: the settings differing from the game settings above
+        """
+        unknown = set(settings) - set(self.names)
+        if unknown:
+            raise ValueError("unknown settings: %s."
+                             % ", ".join(sorted(unknown)))
+        defaults = globals()
+        for name in self.names:
+            setattr(self, name, settings.get(name, defaults[name]))
+
+    def __repr__(self):
+        return "GameConfig(%s)" % ", ".join("%s=%r" % item
+                                            for item in self.asDict().items())
+
+    @classmethod
+    def parse(cls, args):
+        """Returns a GameConfig object with the settings of a list of
+        "name=value" strings (e.g. the command line arguments). The values
+        are Python literals; other values are taken as strings. Raises a
+        ValueError if an argument is not of this form."""
+        settings = {}
+        for arg in args:
+            name, sep, value = arg.partition("=")
+            if not sep:
+                raise ValueError("setting %r is not of the form name=value."
+                                 % arg)
+            try:
+                settings[name.strip()] = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                settings[name.strip()] = value
+        return cls(**settings)
+
+    @property
+    def thresholds(self):
+        """Returns the (blue, green, yellow, red) distance thresholds of the
+        mine detector."""
+        return (self.distBlue, self.distGreen, self.distYellow, self.distRed)
+
+    def asDict(self):
+        """Returns a dictionnary of the settings."""
+        return {name: getattr(self, name) for name in self.names}
+
+    def replace(self, **settings):
+        """Returns a copy of the settings with some settings changed."""
+        return GameConfig(**dict(self.asDict(), **settings))
 
-        # check if the goal block is has been hit (block is air)
-        if mc.getBlock(goal.x, goal.y, goal.z) == 0:
-
-            # if block has just been hit
-            if not goalReached:
-                # set goal reached to True so messages appear only once
-                goalReached = True
-                # post messages to Minecraft chat
-                mc.postToChat("Objective reached!")
-                mc.postToChat("Now return to your starting point marked")
-                mc.postToChat("by a red block and destroy the block")
-
-        # check if the base block is has been hit (block is air)
-        if mc.getBlock(base.x, base.y, base.z) == 0:
-
-            # if goal is already reached
-            if goalReached:
-                # player has completed the mission
-                succeeded = True
-
-            # if goal is not already reached, player must first reach the goal
-            else:
-                # post message to Minecraft chat
-                mc.postToChat("You must fist find and destroy the block of gold")
-                # put back the base block
-                mc.setBlock(base.x, base.y, base.z, block.GLOWING_OBSIDIAN)
-
-    ## Game ending
-
-    # stop mine detector buzzer
-    mineDetector.buzzer.stop()
-
-    # case where the player is dead
-    if not alive:
-        # create explosion effect
-        explosion(3)
-
-        # post messages to Minecraft chat
-        mc.postToChat("BOOM!!!")
-        mc.postToChat(" ")
-        mc.postToChat("Oh oh... Looks like you are dead!")
-        print("Player is dead - cleaning up game")
-
-        # set base and goal blocks to air
-        clean()
-
-        # blink mine detector leds for a few seconds
-        mineDetector.blinkValue(0, 3)
-        time.sleep(6)
-        mineDetector.blinkOff()
-
-    # case where the player has succeeded in completing the mission
-    else:
-        # post message to Minecraft chat
-        mc.postToChat("Congratulations, you have successfully")
-        mc.postToChat("finished your mission!")
-
-        # stop mine detector
-        mineDetector.off()
-
-        # calculate play time
-        playTime = time.time() - timeStart
-
-        # calculate minutes and seconds from play time
-        minutes = str(int(playTime // 60))
-        seconds = str(int(playTime % 60))
-
-        # display play time to Minecraft chat
-        mc.postToChat(("Time: " + minutes + "m " + seconds + "s"))
-
-# Handle player interruption (Ctrl-C)
-except KeyboardInterrupt:
-    print("Game interrupted - cleaning up game")
-
-# Close game - do clean-up and close running threads
-finally:
-    # set base and goal blocks to air
-    clean()
+########################################
+### Game
 
-    # stop mine detector LEDs and buzzer
-    mineDetector.off()
-    mineDetector.buzzer.stop()
+def main(config=None):
+    """Runs the MineField game.
 
-    print("Game closed successfully")
+    Keyword arguments:
+    config: the game settings (GameConfig type object, the game settings
+        above by default)
+    """
+    from session import MineFieldSession
+
+    timeStart = time.perf_counter()
+    if config is None:
+        config = GameConfig()
+
+    ########################################
+    ### Game preparation
+
+    # Initialization of the mine detector hardware in the background, while
+    # the connection is made and the mine field generated
+    hardware = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    detectorInit = hardware.submit(createDetector, config)
+    hardware.shutdown(wait=False)
+    mineDetector = None
+    session = None
+    stats = None
+
+    try:
+        # Connection to Minecraft Pi
+        mc = connect(config.address, config.port)
+
+        # Game loop statistics
+        if config.statsFile is not None:
+            stats = TickStats()
+            stats.dumpOnSignal(config.statsFile)
+
+        # Base and goal blocks, mines and player position
+        session = MineFieldSession(mc, config, stats=stats)
+        session.prepare()
+        cacheStats = mc.stats()
+        print("   World cache: ", cacheStats["hits"], " hits, ",
+              cacheStats["misses"], " misses, ", cacheStats["queries"],
+              " queries in ", cacheStats["reads"], " reads.")
+
+        # Mine detector, ready by now in most cases
+        mineDetector = detectorInit.result()
+        session.mineDetector = mineDetector
+
+        ########################################
+        ### Start game
+
+        print("Game start")
+
+        # Run the game until the player is dead or has succeeded
+        asyncio.run(session.run())
+
+    # Handle player interruption (Ctrl-C)
+    except KeyboardInterrupt:
+        print("Game interrupted - cleaning up game")
+
+    # Close game - do clean-up and close running threads
+    finally:
+        # set base and goal blocks to air and write the end of the player
+        # trajectory
+        if session is not None:
+            session.close()
+            if session.recorder is not None:
+                print("Player trajectory written to", config.trajectoryFile)
+
+        # stop mine detector LEDs, buzzer and scheduler thread
+        if mineDetector is None:
+            # preparation interrupted, wait for the hardware initialization
+            try:
+                mineDetector = detectorInit.result()
+            except Exception:
+                pass
+        if mineDetector is not None:
+            mineDetector.stop()
+
+        # write the game loop statistics
+        engine = session.engine if session is not None else None
+        if stats is not None:
+            if engine is not None and engine.firstTickTime is not None:
+                stats.add("startup", engine.firstTickTime - timeStart)
+            stats.dump(config.statsFile)
+            print("Game loop statistics written to", config.statsFile)
+
+        print("Game closed successfully")
+
+    if engine is not None and engine.firstTickTime is not None:
+        print("   Time to first tick: {:.2f} s".format(
+            engine.firstTickTime - timeStart))
+
+if __name__ == "__main__":
+    # settings can be changed on the command line, e.g. nbMines=400 seed=1
+    try:
+        config = GameConfig.parse(sys.argv[1:])
+    except ValueError as e:
+        sys.exit("minefield.py: " + str(e))
+    main(config)
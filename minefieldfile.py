@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+# minefieldfile.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+################################################################################
+#
+# Binary file format of the mine fields:
+#
+#   offset  size  content
+#   0       4     magic number b"MFLD"
+#   4       2     format version (uint16)
+#   6       2     reserved
+#   8       4     length of the JSON header (uint32)
+#   12      4     reserved
+#   16      8     number of mines (uint64)
+#   24      ...   JSON header (UTF-8): seed, base, goal, mines y coordinate
+#                 and game settings
+#   ...     ...   padding to a multiple of 64 bytes
+#   ...     8*N   mines x, z coordinates (int32 pairs)
+#
+# All the numbers are little-endian. The coordinates are memory-mapped when
+# the file is loaded: opening a file of millions of mines does not read or
+# copy them, and processes loading the same file share the same pages.
+#
+################################################################################
+
+import json
+import struct
+
+import numpy as np
+
+from pointarray import PointArray
+from pt3d import Pt3D
+
+_magic = b"MFLD"
+_version = 1
+_fixedHeader = struct.Struct("<4sHHIIQ")
+_alignment = 64
+
+class MineLayout:
+    """A class defining a mine field layout loaded from a file: the mines x, z
+    coordinates (read-only, memory-mapped (N, 2) int32 array), the base and
+    goal positions, the seed and the game settings."""
+
+    def __init__(self, xz, base, goal, seed=None, settings=None, mineY=-64):
+        """Constructor. Returns a MineLayout object instance.
+
+        Keyword arguments:
+        xz: the (N, 2) array of the mines x, z coordinates
+        base: the base position (Pt3D type object)
+        goal: the goal position (Pt3D type object)
+        seed: the seed the layout was generated with
+        settings: dictionnary of the game settings
+        mineY: the y coordinate of the mines
+        """
+        self.xz = xz
+        self.base = base
+        self.goal = goal
+        self.seed = seed
+        self.settings = {} if settings is None else settings
+        self.mineY = mineY
+
+    def __len__(self):
+        """Returns the number of mines."""
+        return len(self.xz)
+
+    def mines(self):
+        """Returns the mines as a PointArray type object (in memory)."""
+        return PointArray(np.column_stack((self.xz[:, 0],
+                                           np.full(len(self.xz), self.mineY),
+                                           self.xz[:, 1])))
+
+def saveMineField(path, mines, base, goal, seed=None, settings=None):
+    """Saves a mine field to a binary file.
+
+    Keyword arguments:
+    path: the file path
+    mines: the mines (PointArray type object)
+    base: the base position (Pt3D type object)
+    goal: the goal position (Pt3D type object)
+    seed: the seed the mine field was generated with
+    settings: dictionnary of the game settings
+    """
+    coords = mines.coords
+    mineY = int(coords[0, 1]) if len(coords) else -64
+    header = json.dumps({"seed": seed,
+                         "base": np.asarray(base.coords()).tolist(),
+                         "goal": np.asarray(goal.coords()).tolist(),
+                         "mineY": mineY,
+                         "settings": {} if settings is None else settings},
+                        sort_keys=True).encode("utf-8")
+    xz = np.ascontiguousarray(coords[:, [0, 2]], dtype="<i4")
+    with open(path, "wb") as f:
+        f.write(_fixedHeader.pack(_magic, _version, 0, len(header), 0,
+                                  len(xz)))
+        f.write(header)
+        end = _fixedHeader.size + len(header)
+        f.write(b"\0" * (-end % _alignment))
+        f.write(xz.tobytes())
+
+def loadMineField(path):
+    """Loads a mine field from a binary file and returns a MineLayout type
+    object. The mines coordinates are memory-mapped (read-only). Raises a
+    ValueError if the file is not a mine field file."""
+    with open(path, "rb") as f:
+        fixed = f.read(_fixedHeader.size)
+        if len(fixed) < _fixedHeader.size:
+            raise ValueError("%s is not a mine field file." % path)
+        magic, version, _, headerLen, _, count = _fixedHeader.unpack(fixed)
+        if magic != _magic:
+            raise ValueError("%s is not a mine field file." % path)
+        if version != _version:
+            raise ValueError("unsupported mine field file version %d."
+                             % version)
+        header = json.loads(f.read(headerLen).decode("utf-8"))
+    end = _fixedHeader.size + headerLen
+    offset = end + (-end % _alignment)
+    if count:
+        xz = np.memmap(path, dtype="<i4", mode="r", offset=offset,
+                       shape=(count, 2))
+    else:
+        xz = np.empty((0, 2), dtype="<i4")
+    return MineLayout(xz, Pt3D(*header["base"]), Pt3D(*header["goal"]),
+                      header["seed"], header["settings"], header["mineY"])
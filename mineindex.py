@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+
+# mineindex.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import array
+import bisect
+import math
+
+import numpy as np
+
+from pt3d import Pt3D
+
+class MineIndex:
+    """A class defining a spatial index of mines (Pt3D objects) in the
+    horizontal (xz) plane. The mines are stored in a uniform grid of square
+    cells hashed on their cell coordinates so that proximity queries only look
+    at the few cells around the query point instead of the whole mine list.
+    """
+
+    def __init__(self, mines=(), cellSize=16):
+        """Constructor. Returns a MineIndex object instance.
+
+        Keyword arguments:
+        mines: an iterable of mines (Pt3D type objects) to add to the index
+        cellSize: the side length of the grid cells. Using the largest
+            detection distance (e.g. distBlue) means a detector query only
+            touches the cells adjacent to the player.
+        """
+        if cellSize <= 0:
+            raise ValueError("cellSize must be greater than 0.")
+        self._cellSize = cellSize
+        self._cells = {}            # cell coordinates -> list of mines
+        self._count = 0             # number of mines in the index
+        for mine in mines:
+            self.add(mine)
+
+    def __len__(self):
+        """Returns the number of mines in the index."""
+        return self._count
+
+    def __iter__(self):
+        """Iterates over all the mines in the index."""
+        for cell in self._cells.values():
+            for mine in cell:
+                yield mine
+
+    def _cellKey(self, x, z):
+        """Returns the coordinates of the cell containing position x, z."""
+        return (int(x // self._cellSize), int(z // self._cellSize))
+
+    def _keysAround(self, pt, radius):
+        """Returns the list of the coordinates of the non empty cells
+        overlapping the square of half side radius centered on point pt."""
+        cxMin, czMin = self._cellKey(pt.x - radius, pt.z - radius)
+        cxMax, czMax = self._cellKey(pt.x + radius, pt.z + radius)
+
+        # if the square covers more cells than there are non empty cells, it is
+        # cheaper to filter the non empty cells directly
+        if (cxMax - cxMin + 1) * (czMax - czMin + 1) > len(self._cells):
+            return [(cx, cz) for (cx, cz) in self._cells
+                    if cxMin <= cx <= cxMax and czMin <= cz <= czMax]
+
+        return [(cx, cz) for cx in range(cxMin, cxMax + 1)
+                for cz in range(czMin, czMax + 1) if (cx, cz) in self._cells]
+
+    def _cellsAround(self, pt, radius):
+        """Returns the list of mine lists of the non empty cells overlapping
+        the square of half side radius centered on point pt."""
+        return [self._cells[key] for key in self._keysAround(pt, radius)]
+
+    def add(self, mine):
+        """Adds a mine to the index.
+
+        Keyword arguments:
+        mine: the mine to add (Pt3D type object)
+        """
+        key = self._cellKey(mine.x, mine.z)
+        if key in self._cells:
+            self._cells[key].append(mine)
+        else:
+            self._cells[key] = [mine]
+        self._count += 1
+
+    def remove(self, mine):
+        """Removes a mine from the index. Raises a ValueError if the mine is
+        not in the index.
+
+        Keyword arguments:
+        mine: the mine to remove (Pt3D type object)
+        """
+        key = self._cellKey(mine.x, mine.z)
+        cell = self._cells.get(key)
+        if cell is None:
+            raise ValueError("mine is not in the index.")
+        cell.remove(mine)
+        if not cell:                # forget empty cells
+            del self._cells[key]
+        self._count -= 1
+
+    def removeWithin(self, pt, radius):
+        """Removes all the mines located within a distance radius of point pt
+        in the horizontal (xz) plane and returns them in a list. Each cell
+        around the point is filtered in a single pass.
+
+        Keyword arguments:
+        pt: the point to clear around (Pt3D type object)
+        radius: the clearing distance
+        """
+        radius2 = radius * radius
+        removed = []
+        for key in self._keysAround(pt, radius):
+            kept = []
+            for mine in self._cells[key]:
+                if pt.distAxes2(mine, 5) <= radius2:
+                    removed.append(mine)
+                else:
+                    kept.append(mine)
+            if kept:
+                self._cells[key] = kept
+            else:                   # forget empty cells
+                del self._cells[key]
+        self._count -= len(removed)
+        return removed
+
+    def within(self, pt, radius):
+        """Returns the list of mines located within a distance radius of point
+        pt in the horizontal (xz) plane.
+
+        Keyword arguments:
+        pt: the point to search around (Pt3D type object)
+        radius: the search distance
+        """
+        radius2 = radius * radius
+        return [mine for cell in self._cellsAround(pt, radius)
+                for mine in cell if pt.distAxes2(mine, 5) <= radius2]
+
+    def nearest(self, pt, maxDist):
+        """Returns a (mine, distance) tuple for the mine nearest to point pt in
+        the horizontal (xz) plane. Only mines within maxDist are considered;
+        (None, math.inf) is returned if there are none.
+
+        Keyword arguments:
+        pt: the point to search around (Pt3D type object)
+        maxDist: the maximum distance to search
+        """
+        # compare squared distances, a single square root on the result
+        mineMin = None
+        dist2Min = math.inf
+        for cell in self._cellsAround(pt, maxDist):
+            for mine in cell:
+                dist2 = pt.distAxes2(mine, 5)
+                if dist2 < dist2Min:
+                    mineMin = mine
+                    dist2Min = dist2
+        if dist2Min > maxDist * maxDist:
+            return (None, math.inf)
+        return (mineMin, math.sqrt(dist2Min))
+
+class PackedMineIndex:
+    """A class defining a read-only spatial index of mines in the horizontal
+    (xz) plane, held in compact arrays: the mines are sorted by grid cell, with
+    their coordinates in int32 arrays and their cell keys in an int64 array (20
+    bytes per mine, no object per mine). The cells of a grid row being
+    contiguous in the sorted arrays, a proximity query only needs a binary
+    search per row of cells around the query point. It has the query interface
+    of the MineIndex class (within, nearest), so a ProximityTracker can use it.
+    """
+
+    _rowStride = 1 << 32            # cell key = cx * _rowStride + cz
+
+    def __init__(self, coords=(), cellSize=16):
+        """Constructor. Returns a PackedMineIndex object instance.
+
+        Keyword arguments:
+        coords: an array-like of shape (N, 3) of the x, y, z coordinates of
+            the mines (e.g. the coords attribute of a PointArray)
+        cellSize: the side length of the grid cells (see MineIndex)
+        """
+        if cellSize <= 0:
+            raise ValueError("cellSize must be greater than 0.")
+        self._cellSize = cellSize
+        coords = np.asarray(coords).reshape(-1, 3)
+        cx = np.floor_divide(coords[:, 0], cellSize).astype(np.int64)
+        cz = np.floor_divide(coords[:, 2], cellSize).astype(np.int64)
+        keys = cx * self._rowStride + cz
+        order = np.argsort(keys, kind="stable")
+        # the queries read a few elements at a time, faster from plain arrays
+        # than from NumPy arrays
+        self._keys = array.array("q", keys[order].tobytes())
+        coords = coords[order].astype(np.int32)
+        self._x = array.array("i", coords[:, 0].tobytes())
+        self._y = array.array("i", coords[:, 1].tobytes())
+        self._z = array.array("i", coords[:, 2].tobytes())
+
+    def __len__(self):
+        """Returns the number of mines in the index."""
+        return len(self._keys)
+
+    def __iter__(self):
+        """Iterates over all the mines in the index (Pt3D type objects)."""
+        for x, y, z in zip(self._x, self._y, self._z):
+            yield Pt3D(x, y, z)
+
+    @property
+    def nbytes(self):
+        """Returns the memory size of the index arrays (bytes)."""
+        return sum(a.itemsize * len(a)
+                   for a in (self._keys, self._x, self._y, self._z))
+
+    def _rows(self, pt, radius):
+        """Returns the list of the (start, end) index ranges of the mines in
+        the cells overlapping the square of half side radius centered on point
+        pt, one range per row of cells."""
+        size = self._cellSize
+        keys = self._keys
+        czMin = math.floor((pt.z - radius) / size)
+        czMax = math.floor((pt.z + radius) / size)
+        ranges = []
+        for cx in range(math.floor((pt.x - radius) / size),
+                        math.floor((pt.x + radius) / size) + 1):
+            row = cx * self._rowStride
+            start = bisect.bisect_left(keys, row + czMin)
+            end = bisect.bisect_left(keys, row + czMax + 1, start)
+            if end > start:
+                ranges.append((start, end))
+        return ranges
+
+    def within(self, pt, radius):
+        """Returns the list of mines (Pt3D type objects) located within a
+        distance radius of point pt in the horizontal (xz) plane.
+
+        Keyword arguments:
+        pt: the point to search around (Pt3D type object)
+        radius: the search distance
+        """
+        radius2 = radius * radius
+        px = pt.x
+        pz = pt.z
+        found = []
+        for start, end in self._rows(pt, radius):
+            for x, y, z in zip(self._x[start:end], self._y[start:end],
+                               self._z[start:end]):
+                dx = x - px
+                dz = z - pz
+                if dx * dx + dz * dz <= radius2:
+                    found.append(Pt3D(x, y, z))
+        return found
+
+    def nearest(self, pt, maxDist):
+        """Returns a (mine, distance) tuple for the mine nearest to point pt in
+        the horizontal (xz) plane. Only mines within maxDist are considered;
+        (None, math.inf) is returned if there are none.
+
+        Keyword arguments:
+        pt: the point to search around (Pt3D type object)
+        maxDist: the maximum distance to search
+        """
+        # compare squared distances, a single square root on the result
+        px = pt.x
+        pz = pt.z
+        iMin = None
+        dist2Min = math.inf
+        for start, end in self._rows(pt, maxDist):
+            for i in range(start, end):
+                dx = self._x[i] - px
+                dz = self._z[i] - pz
+                dist2 = dx * dx + dz * dz
+                if dist2 < dist2Min:
+                    iMin = i
+                    dist2Min = dist2
+        if iMin is None or dist2Min > maxDist * maxDist:
+            return (None, math.inf)
+        return (Pt3D(self._x[iMin], self._y[iMin], self._z[iMin]),
+                math.sqrt(dist2Min))
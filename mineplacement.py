@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+# mineplacement.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+
+import numpy as np
+
+from pointarray import PointArray
+
+def placeMines(center, nbMines, extent, minSpacing=1, safeZones=(),
+               rng=None, mineY=-64, maxStall=20, maxGridCells=2**24):
+    """Returns nbMines mines (PointArray type object) placed at random tiles
+    within +/- extent of a center point in the horizontal (xz) plane, at least
+    minSpacing apart from each other and outside of the safe zones. Raises a
+    ValueError if the mines cannot be placed (too dense).
+
+    The mines are placed by rounds of vectorized rejection sampling (dart
+    throwing): each round draws a batch of candidate tiles, drops those in the
+    safe zones, then those too close to the mines already placed or to an
+    earlier candidate of the batch. The neighbours are found on a grid of cells
+    of side minSpacing / sqrt(2), holding at most one mine each.
+
+    Keyword arguments:
+    center: the center of the mine field (Pt3D type object)
+    nbMines: the number of mines
+    extent: the extent of the mine field around the center (+/-)
+    minSpacing: the minimum distance between two mines (1: one mine per tile)
+    safeZones: list of (point, radius) tuples of the zones without mines
+        (e.g. [(base, 2), (goal, 2)])
+    rng: the random generator (numpy.random.Generator type object, a new
+        unseeded generator by default)
+    mineY: the y coordinate of the mines
+    maxStall: the number of rounds without any mine placed after which the
+        placement fails
+    maxGridCells: the largest number of grid cells for which the grid is
+        stored in dense arrays (faster) rather than as sorted cell keys
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    x0 = math.floor(center.x) - extent
+    z0 = math.floor(center.z) - extent
+    side = 2 * extent + 1
+
+    # distinct tiles are always at least one tile apart
+    if minSpacing <= 1:
+        cellSize = 1
+        reach = 0
+    else:
+        cellSize = minSpacing / math.sqrt(2)
+        reach = math.ceil(minSpacing / cellSize)
+    nbCellsZ = math.ceil(side / cellSize) + 2 * reach
+    offsets = [(i, j) for i in range(-reach, reach + 1)
+               for j in range(-reach, reach + 1) if (i, j) != (0, 0)]
+    minSpacing2 = minSpacing**2
+
+    # cell -> index lookup tables: dense arrays when the grid is small enough,
+    # sorted cell keys otherwise
+    dense = nbCellsZ**2 <= maxGridCells
+    if dense:
+        placedGrid = np.full(nbCellsZ**2, -1, dtype=np.int32)
+        candGrid = np.full(nbCellsZ**2, -1, dtype=np.int32)
+
+    def cellKeys(xz):
+        """Returns the cell keys of (x, z) tile offsets."""
+        cells = (xz / cellSize).astype(np.int64) + reach
+        return cells[:, 0] * nbCellsZ + cells[:, 1]
+
+    def sortedTable(keys):
+        """Returns a lookup table of cell keys based on the sorted keys."""
+        order = np.argsort(keys)
+        return keys[order], order
+
+    def lookup(table, keys):
+        """Returns the indexes of the points in the cells of a lookup table,
+        -1 for empty cells."""
+        if dense:
+            return table[keys]
+        keysSorted, order = table
+        if len(keysSorted) == 0:
+            return np.full(len(keys), -1)
+        pos = np.searchsorted(keysSorted, keys).clip(0, len(keysSorted) - 1)
+        return np.where(keysSorted[pos] == keys, order[pos], -1)
+
+    # mines placed, as (x, z) tile offsets from the corner
+    placed = np.empty((0, 2), dtype=np.int64)
+    placedTable = placedGrid if dense else sortedTable(np.empty(0, np.int64))
+
+    stall = 0
+    acceptance = .5                 # fraction of the candidates accepted
+    while len(placed) < nbMines:
+        # batch sized on the acceptance of the previous round so that the
+        # number of rounds stays small as the field fills up
+        need = nbMines - len(placed)
+        batch = int(min(need / max(acceptance, .01) * 1.2, 4 * nbMines)) + 64
+        cand = rng.integers(0, side, (batch, 2))
+
+        # drop the candidates in the safe zones
+        keep = np.ones(len(cand), dtype=bool)
+        for pt, radius in safeZones:
+            dx = cand[:, 0] + x0 - pt.x
+            dz = cand[:, 1] + z0 - pt.z
+            keep &= dx * dx + dz * dz > radius**2
+        cand = cand[keep]
+
+        # keep the first candidate drawn in each cell, not in a cell already
+        # used. The candidates are sorted by cell key (faster lookups) and
+        # ranked by drawing order.
+        keys, rank = np.unique(cellKeys(cand), return_index=True)
+        cand = cand[rank]
+        keep = lookup(placedTable, keys) < 0
+
+        # drop the candidates too close to a placed mine or to a candidate drawn
+        # earlier in the neighbour cells
+        if dense:
+            candGrid[keys] = np.arange(len(keys))
+            candTable = candGrid
+        else:
+            candTable = (keys, np.arange(len(keys)))
+        for i, j in offsets:
+            nKeys = keys + i * nbCellsZ + j
+            if len(placed):
+                k = lookup(placedTable, nKeys)
+                d2 = ((cand - placed[k])**2).sum(axis=1)
+                keep &= (k < 0) | (d2 >= minSpacing2)
+            k = lookup(candTable, nKeys)
+            d2 = ((cand - cand[k])**2).sum(axis=1)
+            keep &= (k < 0) | (rank[k] > rank) | (d2 >= minSpacing2)
+        if dense:
+            candGrid[keys] = -1
+
+        # first candidates drawn among the accepted ones
+        accepted = np.flatnonzero(keep)
+        if len(accepted) > need:
+            accepted = accepted[np.argsort(rank[accepted])[:need]]
+        new = cand[accepted]
+        acceptance = keep.sum() / batch
+        if len(new) == 0:
+            stall += 1
+            if stall >= maxStall:
+                raise ValueError("could not place %d mines with a spacing of %s "
+                                 "(%d placed)." % (nbMines, minSpacing,
+                                                   len(placed)))
+            continue
+        stall = 0
+        if dense:
+            placedGrid[cellKeys(new)] = np.arange(len(placed),
+                                                  len(placed) + len(new))
+        placed = np.concatenate((placed, new))
+        if not dense:
+            placedTable = sortedTable(cellKeys(placed))
+
+    return PointArray(np.column_stack((placed[:, 0] + x0,
+                                       np.full(len(placed), mineY),
+                                       placed[:, 1] + z0)))
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+# nullgpio.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+class NullLED:
+    """A class replacing the gpiozero LED class to run the mine detector
+    without GPIO (e.g. in simulations). It only keeps track of its state."""
+
+    def __init__(self, pin):
+        """Constructor. Returns a NullLED object instance.
+
+        Keyword arguments:
+        pin: the GPIO pin number (not used)
+        """
+        self.pin = pin
+        self.is_lit = False
+
+    def on(self):
+        """Turns the LED on."""
+        self.is_lit = True
+
+    def off(self):
+        """Turns the LED off."""
+        self.is_lit = False
+
+class NullBuzzer(NullLED):
+    """A class replacing the gpiozero Buzzer class to run the buzzer without
+    GPIO (e.g. in simulations). It only keeps track of its state."""
+
+    @property
+    def is_active(self):
+        """Returns True if the buzzer is on."""
+        return self.is_lit
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# pointarray.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+
+from pt3d import Pt3D
+
+class PointArray:
+    """A class defining an array of N points in 3D space. It is the vectorized
+    companion of the Pt3D class: the points are stored in a contiguous (N, 3)
+    NumPy array so that distances to all the points are calculated in a single
+    array operation."""
+
+    def __init__(self, coords=()):
+        """Constructor: Returns a PointArray object instance.
+
+        Keyword arguments:
+        coords: an array-like of shape (N, 3) containing the x, y, z
+            coordinates of the points
+        """
+        self.coords = np.ascontiguousarray(coords).reshape(-1, 3)
+
+    @classmethod
+    def fromPt3D(cls, pts):
+        """Returns a PointArray object containing the points of a list of Pt3D
+        type objects."""
+        return cls([pt.coords() for pt in pts])
+
+    def toPt3D(self):
+        """Returns a list of Pt3D type objects with the points coordinates."""
+        return [Pt3D(x, y, z) for x, y, z in self.coords.tolist()]
+
+    def __len__(self):
+        """Returns the number of points in the array."""
+        return len(self.coords)
+
+    def __getitem__(self, i):
+        """Returns the point at index i as a Pt3D type object."""
+        return Pt3D(*self.coords[i].tolist())
+
+    def select(self, mask):
+        """Returns a new PointArray containing the points selected by a boolean
+        mask (or an array of indexes)."""
+        return PointArray(self.coords[mask])
+
+    def dist3D(self, pt):
+        """Returns an array of the 3D distances from each point to another
+        point pt."""
+        return self.distAxes(pt, 7)
+
+    def distAxes(self, pt, axes):
+        """Returns an array of the distances from each point to another point pt
+        along the specified axes or planes.
+
+        Keyword arguments:
+        pt: point to calculate distance to (Pt3D type object)
+        axes: Axes to use for distance calculation (see Pt3D.distAxes)
+            1: x axis
+            2: y axis
+            4: z axis
+            3: xy plane (1 + 2)
+            5: xz plane (1 + 4)
+            6: yz plane (2 + 4)
+            7: 3D xyz (1 + 2 + 4)
+        """
+        return np.sqrt(self._dist2(pt, axes))
+
+    def _dist2(self, pt, axes):
+        """Returns an array of the squared distances from each point to another
+        point pt along the specified axes or planes."""
+        # columns of the selected axes (bit i of axes selects column i)
+        cols = [i for i in range(3) if axes & (1 << i)]
+        diff = self.coords[:, cols] - np.array(pt.coords())[cols]
+        return np.einsum("ij,ij->i", diff, diff)
+
+    def argminDist(self, pt, axes=5):
+        """Returns the index of the point nearest to another point pt along the
+        specified axes or planes (horizontal xz plane by default). Returns -1 if
+        the array is empty.
+
+        Keyword arguments:
+        pt: point to calculate distance to (Pt3D type object)
+        axes: Axes to use for distance calculation (see distAxes)
+        """
+        if len(self.coords) == 0:
+            return -1
+        return int(np.argmin(self._dist2(pt, axes)))
+
+    def maskWithin(self, pt, radius, axes=5):
+        """Returns a boolean array that is True for the points located within a
+        distance radius of another point pt along the specified axes or planes
+        (horizontal xz plane by default).
+
+        Keyword arguments:
+        pt: point to calculate distance to (Pt3D type object)
+        radius: the distance
+        axes: Axes to use for distance calculation (see distAxes)
+        """
+        return self._dist2(pt, axes) <= radius**2
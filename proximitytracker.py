@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+# proximitytracker.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+
+from pt3d import Pt3D
+
+class ProximityTracker:
+    """A class tracking the distance from the player to the nearest mine as the
+    player moves. The distance is only recalculated when the player changes
+    tile. On a full query, the tracker keeps the short list of mines within
+    detection distance plus a slack distance; as long as the player stays
+    within the slack distance of that anchor tile, only these mines can become
+    the nearest one and the update scans that list alone.
+    """
+
+    def __init__(self, mineIndex, maxDist, slack=2, dangerMap=None):
+        """Constructor. Returns a ProximityTracker object instance.
+
+        Keyword arguments:
+        mineIndex: the mines spatial index (MineIndex or PackedMineIndex type
+            object)
+        maxDist: the detection distance beyond which mines are ignored
+            (e.g. distBlue)
+        slack: the distance the player can move from the anchor tile before
+            the candidate mines list is refreshed from the index
+        dangerMap: optional precomputed distance raster (DangerMap type
+            object) used in priority where it is defined
+        """
+        self._mineIndex = mineIndex
+        self._maxDist = maxDist
+        self._slack = slack
+        self._dangerMap = dangerMap
+        self.invalidate()
+
+    def invalidate(self):
+        """Forgets the cached results. Must be called if the mines change."""
+        self._tile = None           # last tile (x, z) coordinates
+        self._dist2 = math.inf      # nearest mine squared distance at last tile
+        self._anchor = None         # tile where the candidates were collected
+        self._candidates = []       # mines that can be within maxDist
+
+    def update(self, pos):
+        """Returns the horizontal (xz) distance from position pos to the nearest
+        mine, or math.inf if no mine is within maxDist.
+
+        Keyword arguments:
+        pos: the player position (Pt3D type object)
+        """
+        return math.sqrt(self.update2(pos))
+
+    def clearance(self, pos, maxDist):
+        """Returns the horizontal (xz) distance from position pos to the
+        nearest mine, searched beyond the detection distance up to maxDist:
+        maxDist if no mine is within maxDist. Slower than update, for the
+        occasional queries of far mines.
+
+        Keyword arguments:
+        pos: the player position (Pt3D type object)
+        maxDist: the maximum distance to search
+        """
+        return min(self._mineIndex.nearest(pos, maxDist)[1], maxDist)
+
+    def update2(self, pos):
+        """Returns the squared horizontal (xz) distance from position pos to
+        the nearest mine, or math.inf if no mine is within maxDist. Cheaper
+        than update when the distance is only compared to squared thresholds.
+
+        Keyword arguments:
+        pos: the player position (Pt3D type object)
+        """
+        tile = (math.floor(pos.x), math.floor(pos.z))
+
+        # player has not changed tile, return the cached distance
+        if tile == self._tile:
+            return self._dist2
+        self._tile = tile
+
+        # use the precomputed distance where available
+        if self._dangerMap is not None:
+            dist = self._dangerMap.dist(pos)
+            if dist is not None:
+                self._dist2 = dist * dist
+                return self._dist2
+
+        # refresh the candidate mines if the player moved too far from the
+        # anchor tile for them to include all the mines within maxDist
+        if (self._anchor is None or
+                pos.distAxes2(self._anchor, 5) > self._slack * self._slack):
+            self._anchor = Pt3D(tile[0], 0, tile[1])
+            self._candidates = self._mineIndex.within(self._anchor,
+                                                      self._maxDist + self._slack)
+
+        # find the nearest of the candidate mines, comparing squared distances
+        dist2Min = math.inf
+        for mine in self._candidates:
+            dist2 = pos.distAxes2(mine, 5)
+            if dist2 < dist2Min:
+                dist2Min = dist2
+
+        if dist2Min > self._maxDist * self._maxDist:
+            dist2Min = math.inf
+        self._dist2 = dist2Min
+        return dist2Min
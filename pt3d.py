@@ -25,9 +25,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import math
+
 class Pt3D:
     """A class defining a point in 3D space."""
 
+    # no instance dictionnary: smaller objects and faster attribute access
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x=0, y=0, z=0):
         """Constructor: Returns a Pt3D object instance.
 
@@ -48,7 +53,15 @@ class Pt3D:
         """Returns the 3D distance to another point pt."""
 
         # Return 3D distance to point pt (Pythagorean theorem)
-        return ((self.x - pt.x)**2 + (self.y - pt.y)**2 + (self.z - pt.z)**2)**.5
+        return math.sqrt(self.dist2(pt))
+
+    def dist2(self, pt):
+        """Returns the squared 3D distance to another point pt. Comparing
+        squared distances to squared thresholds avoids the square root."""
+        dx = self.x - pt.x
+        dy = self.y - pt.y
+        dz = self.z - pt.z
+        return dx * dx + dy * dy + dz * dz
 
     def distAxes(self, pt, axes):
         """Returns the distance to another point along the specified axes or
@@ -65,6 +78,23 @@ class Pt3D:
             6: yz plane (2 + 4)
             7: 3D xyz (1 + 2 + 4)
         """
+        return math.sqrt(self.distAxes2(pt, axes))
+
+    def distAxes2(self, pt, axes):
+        """Returns the squared distance to another point along the specified
+        axes or planes (see distAxes). Comparing squared distances to squared
+        thresholds avoids the square root.
+
+        Keyword arguments:
+        pt: point to calculate distance to (Pt3D type object)
+        axes: Axes to use for distance calculation (see distAxes)
+        """
+        # Horizontal (xz) plane, used by all the mine distance calculations
+        if axes == 5:
+            dx = self.x - pt.x
+            dz = self.z - pt.z
+            return dx * dx + dz * dz
+
         # Set distances along axes to 0
         dx = 0
         dy = 0
@@ -76,11 +106,47 @@ class Pt3D:
         if axes & 4 == 4:       # z axis is selected
             dz = self.z - pt.z  # Calculate distance along z axis
 
-        # Return distance along selected axes (Pythagorean theorem)
-        return (dx**2 + dy**2 + dz**2)**.5
+        # Return squared distance along selected axes (Pythagorean theorem)
+        return dx * dx + dy * dy + dz * dz
 
     def length(self):
         """Returns vector's length from origin."""
 
         # Return 3D distance from origin (Pythagorean theorem)
         return (self.x**2 + self.y**2 + self.z**2)**.5
+
+class FrozenPt3D(Pt3D):
+    """A class defining an immutable point in 3D space. Frozen points are
+    hashable and compare equal when their coordinates are equal, so they can
+    be used as dictionnary keys or in sets."""
+
+    __slots__ = ()
+
+    def __init__(self, x=0, y=0, z=0):
+        """Constructor: Returns a FrozenPt3D object instance.
+
+        Keyword arguments:
+        x: the x coordinate of the point
+        y: the y coordinate of the point
+        z: the z coordinate of the point
+        """
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+        object.__setattr__(self, "z", z)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenPt3D objects are immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrozenPt3D objects are immutable.")
+
+    def __eq__(self, other):
+        if not isinstance(other, Pt3D):
+            return NotImplemented
+        return self.coords() == other.coords()
+
+    def __hash__(self):
+        return hash(self.coords())
+
+    def __repr__(self):
+        return "FrozenPt3D(%r, %r, %r)" % self.coords()
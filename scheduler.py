@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+# scheduler.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+class Timer:
+    """A class defining a function call scheduled on a Scheduler."""
+
+    __slots__ = ("deadline", "seq", "func", "args")
+
+    def __init__(self, deadline, seq, func, args):
+        """Constructor. Returns a Timer object instance.
+
+        Keyword arguments:
+        deadline: the time of the call (time.monotonic clock)
+        seq: the scheduling order, for the calls with the same deadline
+        func: the function to call
+        args: the arguments of the call
+        """
+        self.deadline = deadline
+        self.seq = seq
+        self.func = func
+        self.args = args
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+class Scheduler:
+    """A class running timed function calls (e.g. the buzzer beeps and the LEDs
+    blinking) on a single thread. The pending calls are kept in a heap of
+    deadlines; the thread sleeps until the earliest deadline and does not wake
+    up at all while no call is pending. Cancelled calls are removed right away.
+
+    The calls are made one at a time on the scheduler thread and must be short.
+    They can schedule other calls.
+    """
+
+    def __init__(self):
+        """Constructor. Returns a Scheduler object instance. The thread is
+        started with the first scheduled call."""
+        self._heap = []             # pending calls (Timer type objects)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = True
+
+    def __len__(self):
+        """Returns the number of pending calls."""
+        return len(self._heap)
+
+    def scheduleAt(self, deadline, func, *args):
+        """Schedules a call of func(*args) at a time deadline (time.monotonic
+        clock) and returns its Timer type object (see cancel). Calls scheduled
+        after the scheduler is stopped are ignored."""
+        timer = Timer(deadline, next(self._seq), func, args)
+        with self._cond:
+            if not self._running:
+                return timer
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, timer)
+            # wake the thread only if its next deadline changed
+            if self._heap[0] is timer:
+                self._cond.notify()
+        return timer
+
+    def schedule(self, delay, func, *args):
+        """Schedules a call of func(*args) in delay seconds and returns its
+        Timer type object (see cancel)."""
+        return self.scheduleAt(time.monotonic() + delay, func, *args)
+
+    def cancel(self, timer):
+        """Cancels a pending call. Does nothing if the call is already made.
+
+        Keyword arguments:
+        timer: the call to cancel (Timer type object returned by schedule)
+        """
+        with self._cond:
+            try:
+                self._heap.remove(timer)
+            except ValueError:
+                return
+            heapq.heapify(self._heap)
+
+    def stop(self):
+        """Drops the pending calls and stops the thread, waiting for the call
+        in progress to complete."""
+        with self._cond:
+            self._running = False
+            self._heap = []
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        """Makes the calls as their deadlines come, until stopped."""
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running:
+                        return
+                    if not self._heap:
+                        self._cond.wait()   # idle until a call is scheduled
+                        continue
+                    delay = self._heap[0].deadline - time.monotonic()
+                    if delay <= 0:
+                        timer = heapq.heappop(self._heap)
+                        break
+                    self._cond.wait(delay)
+            # call outside of the lock so that it can schedule other calls
+            try:
+                timer.func(*timer.args)
+            except Exception:
+                # report the failure and keep serving the other calls (the
+                # thread may be shared by many mine detectors)
+                traceback.print_exc()
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+
+# session.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+################################################################################
+#
+# MineField game sessions hosted many at a time in a single process.
+#
+# A MineFieldSession runs one game on its own Minecraft connection, with its
+# own settings, mine field and mine detector (no module globals). A SessionHost
+# runs many sessions at once, against one or more Minecraft endpoints: the game
+# loops of all the sessions share a single asyncio event loop, their blocking
+# Minecraft calls share a fixed pool of threads and the beeps and blinking of
+# their mine detectors share a single scheduler thread, so the number of
+# threads does not grow with the number of sessions. The mines of each session
+# are held in compact arrays (PackedMineIndex).
+#
+# Load test usage: python3 session.py [--sessions N] [--workers N]
+#                  [--latency S] [--tick-rate R] [--speed S] [--adaptive]
+#   runs N sessions against N fake Minecraft servers with scripted players
+#   and prints the tick rates achieved.
+#
+################################################################################
+
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import io
+import os
+import random
+import resource
+import threading
+import time
+
+import minefield
+from gameengine import GameEngine
+from gpiobackend import RecordingBackend
+from groundscanner import GroundScanner
+from hitdetector import HitDetector
+from instrumentation import TickStats
+from minedetector import MineDetector
+from minefieldfile import saveMineField
+from nullgpio import NullBuzzer
+from scheduler import Scheduler
+from trajectory import TrajectoryRecorder
+
+class MineFieldSession:
+    """A class defining a MineField game session on a Minecraft connection.
+    The session is prepared (blocking, see prepare) then run on an event loop
+    (see run), possibly along with other sessions (see SessionHost)."""
+
+    def __init__(self, mc, config=None, mineDetector=None, scheduler=None,
+                 stats=None):
+        """Constructor. Returns a MineFieldSession object instance.
+
+        Keyword arguments:
+        mc: the connection to Minecraft (e.g. returned by minefield.connect,
+            or a FakeMinecraft type object)
+        config: the game settings (minefield.GameConfig type object, the game
+            settings of minefield.py by default). The mine detector hardware,
+            statistics file and Minecraft address settings are not used by the
+            sessions.
+        mineDetector: the mine detector (MineDetector type object, can also
+            be set once the session is prepared). By default, a mine detector
+            without hardware is created when the game starts and stopped with
+            the session.
+        scheduler: the scheduler timing the beeps and blinking of the default
+            mine detector (Scheduler type object, e.g. shared by the sessions
+            of a host)
+        stats: the game loop statistics collector (TickStats type object),
+            None to run without instrumentation
+        """
+        self.mc = mc
+        self.config = minefield.GameConfig() if config is None else config
+        self.stats = stats
+        self._ownDetector = False
+        self.mineDetector = mineDetector
+        self._scheduler = scheduler
+
+        self.seed = None            # seed of the mine field generation
+        self.fieldFile = None       # mine field file, if any
+        self.base = None            # base block position
+        self.goal = None            # goal block position
+        self.mines = None           # mines (PointArray type object)
+        self.proximityTracker = None
+        self.hitDetector = None
+        self.recorder = None        # player trajectory recorder, if any
+        self.engine = None          # game engine, once running
+        self.succeeded = None       # has the mission succeeded?
+        self.closed = False         # have the game blocks been removed?
+
+    @property
+    def prepared(self):
+        """Returns True if the session is prepared."""
+        return self.base is not None
+
+    def prepare(self):
+        """Prepares the game (blocking): generates or loads the mine field,
+        places the base and goal blocks and the player."""
+        c = self.config
+        mc = self.mc
+
+        # Ground of the world columns evaluated to place the game blocks
+        scanner = GroundScanner(mc)
+
+        # Random generator of the mine field, own to the session so that the
+        # sessions can be prepared concurrently
+        self.seed = c.seed if c.seed is not None else random.randrange(2**32)
+        rng = random.Random(self.seed)
+
+        # Mine field file, also needed to replay a recorded trajectory
+        self.fieldFile = c.mineFieldFile
+        if (self.fieldFile is None and c.trajectoryFile is not None
+                and not c.chunkedField):
+            self.fieldFile = os.path.splitext(c.trajectoryFile)[0] + ".mfld"
+
+        # Base and goal locations and mines
+        path = c.mineFieldFile
+        if path is not None and os.path.exists(path):
+            prepared = minefield.prepareSavedMineField(
+                mc, path, c.distBlue, c.useDangerMap, scanner)
+            base, goal, self.mines, self.proximityTracker = prepared
+        else:
+            prepared = minefield.prepareMineField(
+                mc, c.nbMines, c.extentMines, c.goalDist, c.distBlue,
+                c.distMineTrigger, c.useDangerMap, c.chunkedField,
+                c.minMineSpacing, scanner, rng)
+            base, goal, self.mines, self.proximityTracker = prepared
+            if self.fieldFile is not None and not c.chunkedField:
+                print("Saving the mine field")
+                saveMineField(self.fieldFile, self.mines, base, goal,
+                              self.seed,
+                              {"nbMines": c.nbMines,
+                               "extentMines": c.extentMines,
+                               "goalDist": c.goalDist,
+                               "distMineTrigger": c.distMineTrigger,
+                               "minMineSpacing": c.minMineSpacing})
+
+        # Create the base and goal blocks
+        from mcpi import block
+        mc.setBlock(base.x, base.y, base.z, block.GLOWING_OBSIDIAN)
+        mc.setBlock(goal.x, goal.y, goal.z, block.GOLD_BLOCK)
+        scanner.forget(base.x, base.z)
+        scanner.forget(goal.x, goal.z)
+
+        # Detection of the goal and base blocks destruction
+        self.hitDetector = HitDetector(mc, [goal, base], c.hitDetection)
+
+        # Set player position next to base block
+        mc.player.setTilePos(base.x + 1, scanner.height(base.x + 1, base.z),
+                             base.z)
+
+        # Post player instructions in Minecraft window
+        mc.postToChat("Find and destroy the block of gold")
+        mc.postToChat("Beware of the mines!!!")
+        mc.postToChat("Use your mine detector to avoid mines")
+        self.base = base
+        self.goal = goal
+
+    async def run(self, executor=None):
+        """Runs the game until it ends, preparing it first if needed, and
+        cleans up the game blocks. Returns True if the mission succeeded,
+        False if the player is dead.
+
+        Keyword arguments:
+        executor: the pool of threads running the Minecraft calls, shared
+            with other sessions (concurrent.futures.Executor type object),
+            None to run them on a dedicated thread
+        """
+        c = self.config
+        loop = asyncio.get_running_loop()
+        if not self.prepared:
+            await loop.run_in_executor(executor, self.prepare)
+        mc = self.mc
+        if self.mineDetector is None:
+            self.mineDetector = MineDetector(
+                *c.thresholds, buzzerClass=NullBuzzer,
+                backend=RecordingBackend(record=False),
+                scheduler=self._scheduler)
+            self.mineDetector.buzzer.stop()     # no beeps timing
+            self._ownDetector = True
+        if c.trajectoryFile is not None and self.recorder is None:
+            self.recorder = TrajectoryRecorder(
+                c.trajectoryFile, c.thresholds,
+                {"mineFieldFile": None if self.fieldFile is None
+                                  else os.path.abspath(self.fieldFile),
+                 "seed": self.seed, "tickRate": c.tickRate,
+                 "distMineTrigger": c.distMineTrigger})
+        self.engine = GameEngine(
+            mc, self.mineDetector, self.proximityTracker, self.hitDetector,
+            self.base, c.distMineTrigger, c.tickRate,
+            functools.partial(minefield.explosion, mc),
+            functools.partial(minefield.clean, mc, self.base, self.goal),
+            self.stats, self.recorder, executor=executor,
+            maxPlayerSpeed=c.maxPlayerSpeed,
+            maxTickInterval=c.maxTickInterval)
+        try:
+            self.succeeded = await self.engine.run()
+        finally:
+            await loop.run_in_executor(executor, self.close)
+        return self.succeeded
+
+    def close(self):
+        """Removes the game blocks, writes the end of the player trajectory and
+        stops the default mine detector (blocking). Does nothing if the session
+        is already closed."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.base is not None:
+            minefield.clean(self.mc, self.base, self.goal)
+        if self.recorder is not None:
+            self.recorder.close()
+        if self._ownDetector and self.mineDetector is not None:
+            self.mineDetector.stop()
+
+class SessionHost:
+    """A class running many MineField game sessions at once in a single
+    process, on a shared event loop, a shared pool of threads for the
+    Minecraft calls and a shared mine detector scheduler thread."""
+
+    def __init__(self, workers=16):
+        """Constructor. Returns a SessionHost object instance.
+
+        Keyword arguments:
+        workers: the number of threads running the Minecraft calls of all the
+            sessions (one call at a time per session)
+        """
+        if workers <= 0:
+            raise ValueError("workers must be greater than 0.")
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="minecraft")
+        self.scheduler = Scheduler()
+        self.sessions = []
+
+    def __len__(self):
+        """Returns the number of sessions."""
+        return len(self.sessions)
+
+    def add(self, mc, config=None, **kwargs):
+        """Creates a session on a Minecraft connection and returns it
+        (MineFieldSession type object).
+
+        Keyword arguments:
+        mc: the connection to Minecraft (e.g. returned by minefield.connect)
+        config: the game settings of the session (minefield.GameConfig type
+            object)
+        kwargs: the other arguments of MineFieldSession
+        """
+        kwargs.setdefault("scheduler", self.scheduler)
+        session = MineFieldSession(mc, config, **kwargs)
+        self.sessions.append(session)
+        return session
+
+    async def prepareAll(self):
+        """Prepares the sessions not prepared yet, concurrently. Returns the
+        list of the results (None, or the exception raised) of each session.
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(
+            *[loop.run_in_executor(self.executor, session.prepare)
+              for session in self.sessions if not session.prepared],
+            return_exceptions=True)
+
+    async def runAll(self):
+        """Runs all the sessions until they end. Returns the list of the
+        results (True if the mission succeeded, False if the player is dead,
+        or the exception raised) of each session; a session failing does not
+        stop the others."""
+        return await asyncio.gather(
+            *[session.run(self.executor) for session in self.sessions],
+            return_exceptions=True)
+
+    def prepare(self):
+        """Prepares the sessions (blocking, see prepareAll)."""
+        return asyncio.run(self.prepareAll())
+
+    def run(self):
+        """Runs the sessions (blocking, see runAll)."""
+        return asyncio.run(self.runAll())
+
+    def close(self):
+        """Stops the pool of threads and the scheduler thread."""
+        self.executor.shutdown(wait=True)
+        self.scheduler.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+        return False
+
+def scriptPlayer(world, base, goal, speed):
+    """Sets a scripted player of a fake world walking from the base to the
+    goal and back, destroying the goal and base blocks on the way."""
+    from fakeminecraft import ScriptedPlayer
+
+    def onGoal():
+        world.hitBlock(goal.x, goal.y, goal.z)
+        # walk back to the base, then destroy it
+        world.script = ScriptedPlayer(
+            world, [(goal.x, goal.z), (base.x + 1, base.z)], speed,
+            lambda: world.hitBlock(base.x, base.y, base.z))
+    world.script = ScriptedPlayer(
+        world, [(base.x + 1, base.z), (goal.x, goal.z)], speed, onGoal)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test of the MineField session host against fake "
+                    "Minecraft servers.")
+    parser.add_argument("--sessions", type=int, default=100,
+                        help="number of concurrent sessions (default: 100)")
+    parser.add_argument("--workers", type=int, default=16,
+                        help="number of threads running the Minecraft calls "
+                             "(default: 16)")
+    parser.add_argument("--latency", type=float, default=0.,
+                        help="simulated network delay of the servers (s)")
+    parser.add_argument("--tick-rate", type=float, default=minefield.tickRate,
+                        help="game loop iterations per second")
+    parser.add_argument("--speed", type=float, default=1.,
+                        help="distance walked by the players per tick")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt the tick rate to the distance to the "
+                             "nearest mine")
+    args = parser.parse_args()
+
+    from fakeminecraft import FakeMinecraftServer, FakeWorld
+
+    # the scripted players walk one step per position read
+    maxPlayerSpeed = args.speed * args.tick_rate if args.adaptive else None
+
+    # one fake Minecraft server per session (a player per world)
+    servers = []
+    try:
+        for i in range(args.sessions):
+            server = FakeMinecraftServer(FakeWorld(), latency=args.latency)
+            server.start()
+            servers.append(server)
+
+        with SessionHost(args.workers) as host:
+            for i, server in enumerate(servers):
+                # the mines never explode, the players walk through them
+                host.add(minefield.connect(*server.address),
+                         minefield.GameConfig(seed=i, distMineTrigger=-1,
+                                              tickRate=args.tick_rate,
+                                              maxPlayerSpeed=maxPlayerSpeed),
+                         stats=TickStats())
+
+            # without the progress messages of the sessions
+            with contextlib.redirect_stdout(io.StringIO()):
+                timeStart = time.perf_counter()
+                errors = [r for r in host.prepare() if r is not None]
+                prepareTime = time.perf_counter() - timeStart
+                for server, session in zip(servers, host.sessions):
+                    if session.prepared:
+                        scriptPlayer(server.world, session.base, session.goal,
+                                     args.speed)
+
+                timeStart = time.perf_counter()
+                results = host.run()
+                runTime = time.perf_counter() - timeStart
+            # threads of the host: all but the main thread and the threads of
+            # the fake servers (one serving, one per connection)
+            threads = threading.active_count() - 1 - 2 * len(servers)
+
+        errors += [r for r in results if isinstance(r, BaseException)]
+        ticks = sum(session.stats.ticks for session in host.sessions)
+        rpcs = sum(session.stats.counters.get("rpc", 0)
+                   for session in host.sessions)
+        rates = [session.stats.summary()["tickRate"]
+                 for session in host.sessions if session.stats.ticks > 1]
+        p99 = max([session.stats.phases["interval"].percentile(99)
+                   for session in host.sessions
+                   if "interval" in session.stats.phases] or [0.])
+        print("{} sessions prepared in {:.2f} s, run in {:.2f} s".format(
+            len(host), prepareTime, runTime))
+        print("   {} succeeded, {} errors".format(results.count(True),
+                                                  len(errors)))
+        for error in errors[:5]:
+            print("   ", repr(error))
+        print("   {} ticks, {:.0f} ticks/s in total, {} Minecraft calls".format(
+            ticks, ticks / runTime, rpcs))
+        if rates:
+            print("   tick rate per session: {:.1f} mean, {:.1f} min "
+                  "(target {:g})".format(sum(rates) / len(rates), min(rates),
+                                         args.tick_rate))
+        print("   tick interval p99 (worst session): {:.1f} ms".format(
+            p99 * 1000))
+        print("   {} host threads, max RSS {:.0f} MB".format(
+            threads, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+    finally:
+        for server in servers:
+            server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# test_hitdetector.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Tests of the goal and base blocks destruction detection (hitdetector.py)
+# against the fake Minecraft server, in the "poll" and "events" modes.
+
+import pytest
+
+import hitdetector
+from fakeminecraft import AIR, GRASS, STONE, FakeMinecraftServer, FakeWorld
+from hitdetector import HitDetector
+from mcbatch import BatchMinecraft
+from pt3d import Pt3D
+
+class Clock:
+    """A clock replacing the time module of hitdetector.py."""
+
+    def __init__(self):
+        self.now = 1000.
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(hitdetector, "time", clock)
+    return clock
+
+@pytest.fixture
+def world():
+    world = FakeWorld()
+    world.setBlock(10, 0, 0, GRASS)     # goal
+    world.setBlock(0, 0, 0, STONE)      # base
+    world.setBlock(5, 0, 5, STONE)      # another block
+    return world
+
+@pytest.fixture
+def mc(world):
+    with FakeMinecraftServer(world) as server:
+        mc = BatchMinecraft.create(*server.address)
+        yield mc
+        mc.conn.socket.close()
+
+goal = Pt3D(10, 0, 0)
+base = Pt3D(0, 0, 0)
+
+def check(detector, mc):
+    """Returns the result of a detection, as in the game loop."""
+    with mc.batch() as b:
+        detector.queue(b)
+    return detector.destroyed()
+
+def latch(state, destroyed):
+    """Returns the targets destroyed so far, as kept by the game loop (the
+    "events" mode only reports the targets hit since the last check)."""
+    return [s or d for s, d in zip(state, destroyed)]
+
+@pytest.mark.parametrize("mode", ["poll", "events"])
+def test_hits(mode, mc, world, clock):
+    detector = HitDetector(mc, [goal, base], mode)
+    assert check(detector, mc) == [False, False]
+    world.hitBlock(5, 0, 5)
+    assert check(detector, mc) == [False, False]
+    world.hitBlock(goal.x, goal.y, goal.z)
+    state = check(detector, mc)
+    assert state == [True, False]
+    world.hitBlock(base.x, base.y, base.z)
+    destroyed = check(detector, mc)
+    assert destroyed[1]
+    assert latch(state, destroyed) == [True, True]
+
+@pytest.mark.parametrize("mode", ["poll", "events"])
+def test_hit_not_destroyed(mode, mc, world, clock):
+    detector = HitDetector(mc, [goal, base], mode)
+    world.hitBlock(goal.x, goal.y, goal.z, destroy=False)
+    assert check(detector, mc) == [False, False]
+
+def test_hits_before_start_ignored(mc, world, clock):
+    world.hitBlock(goal.x, goal.y, goal.z, destroy=False)
+    detector = HitDetector(mc, [goal, base], "events")
+    assert check(detector, mc) == [False, False]
+
+def test_events_poll(mc, world, clock):
+    detector = HitDetector(mc, [goal, base], "events")
+    # destroyed without a hit event (e.g. not with a sword): only seen when
+    # the targets are polled, every second
+    world.setBlock(goal.x, goal.y, goal.z, AIR)
+    assert check(detector, mc) == [False, False]
+    clock.now += .5
+    assert check(detector, mc) == [False, False]
+    clock.now += .5
+    assert check(detector, mc) == [True, False]
+
+def test_events_confirm_round_trip(mc, world, clock):
+    detector = HitDetector(mc, [goal, base], "events")
+    check(detector, mc)     # after the events are cleared
+    requests = world.requests
+    world.hitBlock(5, 0, 5)
+    check(detector, mc)
+    assert world.requests == requests + 1       # block hits only
+    world.hitBlock(goal.x, goal.y, goal.z)
+    requests = world.requests
+    check(detector, mc)
+    assert world.requests == requests + 2       # and the goal block
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+# test_mcbatch.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Tests of the pipelined Minecraft API batches (mcbatch.py) against the fake
+# Minecraft server.
+
+import pytest
+
+from mcpi.connection import RequestError
+
+from fakeminecraft import AIR, GRASS, STONE, FakeMinecraftServer, FakeWorld
+from mcbatch import BatchMinecraft
+
+@pytest.fixture
+def world():
+    return FakeWorld(groundHeight=4)
+
+@pytest.fixture
+def mc(world):
+    with FakeMinecraftServer(world) as server:
+        mc = BatchMinecraft.create(*server.address)
+        yield mc
+        mc.conn.socket.close()
+
+def test_replies_in_order(mc, world):
+    for i in range(10):
+        world.setBlock(i, 10, 0, i)
+    world.setTilePos(3, 4, 5)
+    with mc.batch() as b:
+        blocks = [b.getBlock(i, 10, 0) for i in range(10)]
+        height = b.getHeight(0, 0)
+        pos = b.getTilePos()
+        cuboid = b.getBlocks(0, 10, 0, 9, 10, 0)
+    assert [f.result() for f in blocks] == list(range(10))
+    assert height.result() == 4
+    assert tuple(pos.result()) == (3, 4, 5)
+    assert cuboid.result() == list(range(10))
+
+def test_result_before_send(mc):
+    b = mc.batch()
+    future = b.getBlock(0, 0, 0)
+    with pytest.raises(RuntimeError):
+        future.result()
+    b.send()
+    assert future.result() == STONE
+
+def test_mixed_set_get(mc, world):
+    with mc.batch() as b:
+        before = b.getBlock(1, 4, 1)
+        assert b.setBlock(1, 4, 1, STONE) is None
+        after = b.getBlock(1, 4, 1)
+        b.setBlocks(0, 4, 0, 2, 4, 0, GRASS)
+        row = b.getBlocks(0, 4, 0, 2, 4, 0)
+        b.postToChat("hello")
+        assert len(b) == 6
+    assert before.result() == AIR
+    assert after.result() == STONE
+    assert row.result() == [GRASS] * 3
+    assert world.chat == ["hello"]
+
+def test_failed_reply(mc, world):
+    world.setBlock(0, 10, 0, GRASS)
+    b = mc.batch()
+    first = b.getBlock(0, 10, 0)
+    failed = b.getBlocks(0, 10, 0)      # missing coordinates
+    last = b.getHeight(1, 1)
+    with pytest.raises(RequestError):
+        b.send()
+    assert first.result() == GRASS
+    with pytest.raises(RequestError):
+        failed.result()
+    assert last.result() == 4
+
+    # the next batch reads its own replies
+    with mc.batch() as b:
+        block = b.getBlock(0, 10, 0)
+        height = b.getHeight(1, 1)
+    assert block.result() == GRASS
+    assert height.result() == 4
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+# trajectory.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+################################################################################
+#
+# Recording of the player trajectory of a game and offline replay through the
+# mine detection.
+#
+# Binary file format of the trajectories:
+#
+#   offset  size  content
+#   0       4     magic number b"MFTR"
+#   4       2     format version (uint16)
+#   6       2     reserved
+#   8       4     length of the JSON header (uint32)
+#   12      4     reserved
+#   16      ...   JSON header (UTF-8): detector thresholds, mine field file,
+#                 game settings
+#   ...     ...   padding to a multiple of 64 bytes
+#   ...     32*N  one record per tick, appended as the game runs:
+#                   time since the start (float64, s)
+#                   player tile x, y, z (int32)
+#                   squared distance to the nearest mine (float32, inf: none)
+#                   detector level (uint8)
+#                   flags (uint8): 1 goal destroyed, 2 base destroyed
+#                   reserved (6 bytes)
+#
+# The number of records is given by the file size. The records are read
+# memory-mapped.
+#
+# Replay usage: python3 trajectory.py SESSION.mftr [--mines FILE]
+#               [--danger-map]
+#
+################################################################################
+
+import argparse
+import concurrent.futures
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from gpiobackend import RecordingBackend
+from minedetector import MineDetector, levelFromDist2, squaredThresholds
+from minefieldfile import loadMineField
+from nullgpio import NullBuzzer
+from pt3d import Pt3D
+
+_magic = b"MFTR"
+_version = 1
+_fixedHeader = struct.Struct("<4sHHII")
+_alignment = 64
+_record = struct.Struct("<diiifBB6x")
+
+# NumPy type of the records
+recordType = np.dtype([("t", "<f8"), ("x", "<i4"), ("y", "<i4"),
+                       ("z", "<i4"), ("dist2", "<f4"), ("level", "u1"),
+                       ("flags", "u1"), ("reserved", "V6")])
+
+# Flags of the records
+goalDestroyedFlag = 1
+baseDestroyedFlag = 2
+
+class TrajectoryRecorder:
+    """A class recording the player trajectory of a game, one record per tick,
+    to a binary file. The records are packed into a memory buffer; full
+    buffers are written to the file in bulk by a background thread, so the
+    game loop never waits for the disk."""
+
+    def __init__(self, path, thresholds, header=None, bufferSize=4096):
+        """Constructor. Returns a TrajectoryRecorder object instance and
+        creates the file.
+
+        Keyword arguments:
+        path: the file path
+        thresholds: the (blue, green, yellow, red) distance thresholds of the
+            mine detector
+        header: dictionnary of additional information saved in the file
+            header (e.g. mine field file, game settings)
+        bufferSize: the number of records written to the file at once
+        """
+        if bufferSize <= 0:
+            raise ValueError("bufferSize must be greater than 0.")
+        self._thresholds2 = squaredThresholds(thresholds)
+        header = dict({} if header is None else header,
+                      thresholds=list(thresholds), startTime=time.time())
+        header = json.dumps(header, sort_keys=True).encode("utf-8")
+        self._file = open(path, "wb")
+        self._file.write(_fixedHeader.pack(_magic, _version, 0, len(header),
+                                           0))
+        self._file.write(header)
+        end = _fixedHeader.size + len(header)
+        self._file.write(b"\0" * (-end % _alignment))
+        self._buffer = bytearray(_record.size * bufferSize)
+        self._size = bufferSize
+        self._n = 0                 # number of records in the buffer
+        self._writer = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._start = time.perf_counter()
+        self.records = 0            # number of records
+
+    def record(self, x, y, z, dist2, flags=0):
+        """Records a tick.
+
+        Keyword arguments:
+        x, y, z: the player tile position
+        dist2: the squared distance to the nearest mine (math.inf: none)
+        flags: the goal and base destroyed flags (goalDestroyedFlag and
+            baseDestroyedFlag)
+        """
+        _record.pack_into(self._buffer, self._n * _record.size,
+                          time.perf_counter() - self._start, x, y, z, dist2,
+                          levelFromDist2(dist2, self._thresholds2), flags)
+        self._n += 1
+        self.records += 1
+        if self._n == self._size:
+            self.flush()
+
+    def flush(self):
+        """Hands the buffered records to the writing thread."""
+        if self._n:
+            data = bytes(memoryview(self._buffer)[:self._n * _record.size])
+            self._writer.submit(self._file.write, data)
+            self._n = 0
+
+    def close(self):
+        """Writes the remaining records and closes the file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._writer.shutdown(wait=True)
+        self._file.close()
+        self._file = None
+
+class Trajectory:
+    """A class defining a recorded trajectory: the records (read-only,
+    memory-mapped NumPy array of recordType) and the file header."""
+
+    def __init__(self, records, header):
+        """Constructor. Returns a Trajectory object instance.
+
+        Keyword arguments:
+        records: the array of the records
+        header: dictionnary of the file header
+        """
+        self.records = records
+        self.header = header
+
+    def __len__(self):
+        """Returns the number of records (ticks)."""
+        return len(self.records)
+
+def loadTrajectory(path):
+    """Loads a trajectory from a binary file and returns a Trajectory type
+    object. The records are memory-mapped (read-only). Raises a ValueError if
+    the file is not a trajectory file."""
+    with open(path, "rb") as f:
+        fixed = f.read(_fixedHeader.size)
+        if len(fixed) < _fixedHeader.size:
+            raise ValueError("%s is not a trajectory file." % path)
+        magic, version, _, headerLen, _ = _fixedHeader.unpack(fixed)
+        if magic != _magic:
+            raise ValueError("%s is not a trajectory file." % path)
+        if version != _version:
+            raise ValueError("unsupported trajectory file version %d."
+                             % version)
+        header = json.loads(f.read(headerLen).decode("utf-8"))
+    end = _fixedHeader.size + headerLen
+    offset = end + (-end % _alignment)
+    # ignore an incomplete last record (game interrupted while writing)
+    count = (os.path.getsize(path) - offset) // recordType.itemsize
+    if count > 0:
+        records = np.memmap(path, dtype=recordType, mode="r", offset=offset,
+                            shape=(count,))
+    else:
+        records = np.empty(0, dtype=recordType)
+    return Trajectory(records, header)
+
+def replay(trajectory, proximityTracker, mineDetector, blockSize=65536):
+    """Replays a recorded trajectory through a nearest mine distance tracker
+    and a mine detector, as fast as possible. Returns a dictionnary of the
+    number of ticks, the replay duration and rate, and the number of ticks
+    where the distance or detector level differ from the recording.
+
+    Keyword arguments:
+    trajectory: the recorded trajectory (Trajectory type object)
+    proximityTracker: the distance tracker (ProximityTracker type object)
+    mineDetector: the mine detector (e.g. MineDetector with a
+        RecordingBackend)
+    blockSize: the number of records read from the file at once
+    """
+    records = trajectory.records
+    distErrors = 0
+    levelErrors = 0
+    timeStart = time.perf_counter()
+    for i in range(0, len(records), blockSize):
+        block = records[i:i + blockSize]
+        for x, y, z, dist2, level in zip(block["x"].tolist(),
+                                         block["y"].tolist(),
+                                         block["z"].tolist(),
+                                         block["dist2"].tolist(),
+                                         block["level"].tolist()):
+            d2 = proximityTracker.update2(Pt3D(x, y, z))
+            mineDetector.onDist2(d2)
+            # the recorded distances are single precision
+            if not (d2 == dist2 or abs(d2 - dist2) <= 1e-5 * d2):
+                distErrors += 1
+            if mineDetector.outputLevel != level:
+                levelErrors += 1
+    duration = time.perf_counter() - timeStart
+    return {"ticks": len(records), "duration": duration,
+            "ticksPerSec": len(records) / duration if duration else 0.,
+            "distErrors": distErrors, "levelErrors": levelErrors}
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline replay of a recorded MineField trajectory "
+                    "through the mine detection.")
+    parser.add_argument("trajectory", help="the trajectory file")
+    parser.add_argument("--mines", help="the mine field file (by default the "
+                                        "one named in the trajectory)")
+    parser.add_argument("--danger-map", action="store_true",
+                        help="use a precomputed danger map")
+    args = parser.parse_args()
+
+    import minefield        # imports this module (trajectory recording)
+
+    trajectory = loadTrajectory(args.trajectory)
+    header = trajectory.header
+    minesPath = args.mines or header.get("mineFieldFile")
+    if minesPath is None:
+        parser.error("the trajectory names no mine field file, use --mines")
+    layout = loadMineField(minesPath)
+    thresholds = header["thresholds"]
+    extentMines = layout.settings.get("extentMines", minefield.extentMines)
+    proximityTracker = minefield.trackMines(layout.mines(), layout.base,
+                                            extentMines, thresholds[0],
+                                            args.danger_map)
+    mineDetector = MineDetector(*thresholds, buzzerClass=NullBuzzer,
+                                backend=RecordingBackend(record=False))
+    mineDetector.buzzer.stop()      # no beeps timing
+    try:
+        result = replay(trajectory, proximityTracker, mineDetector)
+    finally:
+        mineDetector.stop()
+    print("{} ticks replayed in {:.3f} s ({:.0f} ticks/s), {} distance and "
+          "{} level differences".format(result["ticks"], result["duration"],
+                                        result["ticksPerSec"],
+                                        result["distErrors"],
+                                        result["levelErrors"]))
+
+if __name__ == "__main__":
+    main()
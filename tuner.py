@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+
+# tuner.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+################################################################################
+#
+# Monte Carlo tuner of the MineField game difficulty.
+#
+# Runs large numbers of simulated games for every combination of the game
+# settings given on the command line, in parallel over a pool of processes. A
+# bot player walks from the base to the goal and back, guided by the mine
+# detector level only. The result of every game is streamed to a CSV file and
+# a summary (success rate, path length, mine density) is printed for each
+# combination of settings.
+#
+# Usage: python3 tuner.py --nbMines 200 400 800 --games 1000 --out tuner.csv
+#
+# Bots are classes with reset(rng) and move(tile, target, level) methods (see
+# CautiousBot) and are selected with --bot module:Class.
+#
+################################################################################
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import importlib
+import io
+import itertools
+import math
+import os
+import random
+
+import numpy as np
+
+import minefield
+from fakeminecraft import FakeMinecraft, FakeWorld
+from minedetector import levelFromDist2, squaredThresholds
+from pt3d import Pt3D
+
+# Names of the settings varied by the tuner (minefield.py game settings)
+settingNames = ["nbMines", "extentMines", "goalDist", "distBlue", "distGreen",
+                "distYellow", "distRed", "distMineTrigger"]
+
+# Columns of the games results file
+resultNames = ["settingsId"] + settingNames + [
+    "game", "seed", "outcome", "steps", "mines", "density",
+    "minesNearPath", "distMin"]
+
+class CautiousBot:
+    """A bot walking towards its target one tile at a time, avoiding the tiles
+    where it has seen the mine detector level reach a maximum level. When the
+    level reaches that maximum, the bot steps back to its previous tile.
+    """
+
+    def __init__(self, maxLevel=4):
+        """Constructor. Returns a CautiousBot object instance.
+
+        Keyword arguments:
+        maxLevel: the detector level the bot avoids (4: red LED)
+        """
+        self._maxLevel = maxLevel
+        self.reset(random.Random())
+
+    def reset(self, rng):
+        """Prepares the bot for a new game.
+
+        Keyword arguments:
+        rng: the random number generator of the game (random.Random object)
+        """
+        self._rng = rng
+        self._levels = {}           # (x, z) -> detector level seen
+        self._visits = {}           # (x, z) -> number of visits
+        self._previous = None       # previous tile
+
+    def move(self, tile, target, level):
+        """Returns the next tile (x, z) of the bot, adjacent to its tile.
+
+        Keyword arguments:
+        tile: the bot tile (x, z)
+        target: the target tile (x, z)
+        level: the mine detector level at the bot tile
+        """
+        self._levels[tile] = level
+        self._visits[tile] = self._visits.get(tile, 0) + 1
+        previous = self._previous
+        self._previous = tile
+
+        # danger, step back
+        if level >= self._maxLevel and previous is not None:
+            return previous
+
+        # move to the neighbour closest to the target, preferring low levels
+        # and tiles not visited yet (the level of unvisited tiles is assumed to
+        # be the current level)
+        best = None
+        scoreBest = math.inf
+        for dx, dz in itertools.product((-1, 0, 1), repeat=2):
+            if dx == 0 and dz == 0:
+                continue
+            n = (tile[0] + dx, tile[1] + dz)
+            lvl = self._levels.get(n)
+            if lvl is None:
+                lvl = level
+            elif lvl >= self._maxLevel:
+                continue
+            score = (math.hypot(target[0] - n[0], target[1] - n[1]) + lvl
+                     + 2 * self._visits.get(n, 0) + self._rng.random() * .1)
+            if score < scoreBest:
+                best = n
+                scoreBest = score
+
+        # surrounded by dangerous tiles, go back
+        if best is None:
+            best = previous if previous is not None else tile
+        return best
+
+def loadBot(spec):
+    """Returns the bot class defined by a 'module:Class' string."""
+    moduleName, className = spec.split(":")
+    return getattr(importlib.import_module(moduleName), className)
+
+def gameSeed(seed, settingsId, game):
+    """Returns the seed of a game, derived from the run seed, the settings and
+    the game number so that every game is reproducible on its own."""
+    return int(np.random.SeedSequence([seed, settingsId, game]).generate_state(1)[0])
+
+def playGame(settings, bot, seed, maxSteps):
+    """Plays a simulated game and returns a dictionnary of its results.
+
+    Keyword arguments:
+    settings: dictionnary of the game settings (settingNames keys)
+    bot: the bot player
+    seed: the seed of the game
+    maxSteps: the number of steps after which the game is abandoned
+    """
+    rng = random.Random(seed)
+    s = settings
+    mc = FakeMinecraft(FakeWorld(seed=seed))
+
+    # game setup as in minefield.py (the settings not varied by the tuner are
+    # those of minefield.py), without the progress messages
+    with contextlib.redirect_stdout(io.StringIO()):
+        base, goal, mines, tracker = minefield.prepareMineField(
+            mc, s["nbMines"], s["extentMines"], s["goalDist"], s["distBlue"],
+            s["distMineTrigger"], minefield.useDangerMap,
+            minSpacing=minefield.minMineSpacing, rng=rng)
+    bot.reset(rng)
+    thresholds2 = squaredThresholds((s["distBlue"], s["distGreen"],
+                                     s["distYellow"], s["distRed"]))
+    dist2Trigger = squaredThresholds((s["distMineTrigger"],))[0]
+
+    # mines within the red distance of the straight path from base to goal
+    a = np.array([base.x, base.z])
+    ab = np.array([goal.x, goal.z]) - a
+    ap = mines.coords[:, [0, 2]] - a
+    t = np.clip(ap @ ab / (ab @ ab), 0, 1)
+    dPath = np.hypot(*(ap - t[:, None] * ab).T)
+    minesNearPath = int((dPath <= s["distRed"]).sum())
+
+    # walk from the base to the goal and back to the base
+    tile = (math.floor(base.x) + 1, math.floor(base.z))
+    targets = [(math.floor(goal.x), math.floor(goal.z)),
+               (math.floor(base.x), math.floor(base.z))]
+    outcome = "timeout"
+    dist2Min = math.inf
+    steps = 0
+    while steps < maxSteps:
+        dist2 = tracker.update2(Pt3D(tile[0], 0, tile[1]))
+        dist2Min = min(dist2Min, dist2)
+        if dist2 <= dist2Trigger:
+            outcome = "dead"
+            break
+        # the target block is hit from an adjacent tile
+        target = targets[0]
+        if max(abs(tile[0] - target[0]), abs(tile[1] - target[1])) <= 1:
+            targets.pop(0)
+            if not targets:
+                outcome = "success"
+                break
+            target = targets[0]
+        tile = bot.move(tile, target, levelFromDist2(dist2, thresholds2))
+        steps += 1
+
+    extent = 2 * s["extentMines"] + 1
+    return {"outcome": outcome, "steps": steps, "mines": len(mines),
+            "density": len(mines) / extent**2 * 1000,
+            "minesNearPath": minesNearPath, "distMin": math.sqrt(dist2Min)}
+
+def runGames(settingsId, settings, games, botSpec, seed, maxSteps):
+    """Plays a chunk of games with the same settings (run in a worker
+    process). Returns the list of the results rows."""
+    bot = loadBot(botSpec)()
+    rows = []
+    for game in games:
+        gSeed = gameSeed(seed, settingsId, game)
+        result = playGame(settings, bot, gSeed, maxSteps)
+        row = {"settingsId": settingsId, "game": game, "seed": gSeed}
+        row.update(settings)
+        row.update(result)
+        rows.append(row)
+    return rows
+
+class Summary:
+    """A class accumulating the statistics of the games of one combination of
+    settings, without keeping the individual results."""
+
+    def __init__(self, settings):
+        """Constructor. Returns a Summary object instance.
+
+        Keyword arguments:
+        settings: dictionnary of the game settings
+        """
+        self.settings = settings
+        self.games = 0
+        self.outcomes = {"success": 0, "dead": 0, "timeout": 0}
+        self._stepsSum = 0.         # sum and sum of squares of the steps of
+        self._stepsSum2 = 0.        # the successful games
+        self._densitySum = 0.
+        self._nearPathSum = 0.
+
+    def add(self, row):
+        """Adds the results of a game."""
+        self.games += 1
+        self.outcomes[row["outcome"]] += 1
+        if row["outcome"] == "success":
+            self._stepsSum += row["steps"]
+            self._stepsSum2 += row["steps"]**2
+        self._densitySum += row["density"]
+        self._nearPathSum += row["minesNearPath"]
+
+    def stats(self):
+        """Returns a dictionnary of the statistics."""
+        n = self.outcomes["success"]
+        stepsMean = self._stepsSum / n if n else math.nan
+        stepsStd = (math.sqrt(max(self._stepsSum2 / n - stepsMean**2, 0))
+                    if n else math.nan)
+        return {"games": self.games,
+                "success": n / self.games,
+                "dead": self.outcomes["dead"] / self.games,
+                "timeout": self.outcomes["timeout"] / self.games,
+                "steps": stepsMean, "stepsStd": stepsStd,
+                "density": self._densitySum / self.games,
+                "nearPath": self._nearPathSum / self.games}
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo tuner of the MineField game difficulty.")
+    for name in settingNames:
+        parser.add_argument("--" + name, type=int, nargs="+",
+                            default=[getattr(minefield, name)],
+                            help="values of the %s setting" % name)
+    parser.add_argument("--games", type=int, default=1000,
+                        help="number of games per combination of settings")
+    parser.add_argument("--bot", default="tuner:CautiousBot",
+                        help="bot class, as module:Class")
+    parser.add_argument("--maxSteps", type=int, default=0,
+                        help="steps after which a game is abandoned "
+                             "(default: 10 x goalDist)")
+    parser.add_argument("--seed", type=int, default=0, help="run seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--chunk", type=int, default=50,
+                        help="number of games per worker task")
+    parser.add_argument("--out", default="tuner.csv",
+                        help="games results file (CSV)")
+    args = parser.parse_args()
+
+    # combinations of settings
+    combinations = [dict(zip(settingNames, values)) for values in
+                    itertools.product(*[getattr(args, n) for n in settingNames])]
+    summaries = [Summary(settings) for settings in combinations]
+
+    def tasks():
+        """Yields the tasks of chunks of games, as arguments of runGames."""
+        for settingsId, settings in enumerate(combinations):
+            maxSteps = args.maxSteps or 10 * settings["goalDist"]
+            for start in range(0, args.games, args.chunk):
+                games = range(start, min(start + args.chunk, args.games))
+                yield (settingsId, settings, games, args.bot, args.seed,
+                       maxSteps)
+
+    # run the tasks and stream the results to the file (in task order, so that
+    # the file is identical from one run to the next). Only a bounded window
+    # of tasks is in flight, so that memory does not grow with the sweep size
+    with open(args.out, "w", newline="") as f, \
+            concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        writer = csv.DictWriter(f, resultNames)
+        writer.writeheader()
+
+        def write(future):
+            """Writes the results rows of a task and adds them to the
+            summaries."""
+            rows = future.result()
+            writer.writerows(rows)
+            for row in rows:
+                summaries[row["settingsId"]].add(row)
+
+        pending = collections.deque()
+        for task in tasks():
+            pending.append(pool.submit(runGames, *task))
+            if len(pending) >= 2 * args.workers:
+                write(pending.popleft())
+        while pending:
+            write(pending.popleft())
+
+    # summary of each combination of settings
+    print(" ".join("{:>8}".format(n[:8]) for n in settingNames),
+          "{:>6} {:>7} {:>6} {:>7} {:>7} {:>7} {:>8}".format(
+              "games", "success", "dead", "timeout", "steps", "density",
+              "nearPath"))
+    for summary in summaries:
+        stats = summary.stats()
+        print(" ".join("{:>8}".format(summary.settings[n])
+                       for n in settingNames),
+              "{:>6} {:>7.1%} {:>6.1%} {:>7.1%} {:>7.1f} {:>7.2f} {:>8.2f}".format(
+                  stats["games"], stats["success"], stats["dead"],
+                  stats["timeout"], stats["steps"], stats["density"],
+                  stats["nearPath"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+# worldcache.py
+# Source: https://github.com/DrGFreeman/MineField
+#
+# MIT License
+#
+# Copyright (c) 2017 Julien de la Bruere-Terreault <drgfreeman@tuta.io>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import itertools
+import math
+
+from mcpi.connection import RequestError
+
+class CachedMinecraft:
+    """A class wrapping a connection to Minecraft (BatchMinecraft type object)
+    to cache the world height and block types. Only the columns and blocks
+    queried are read from the world: the missing entries of a prefetch are
+    read in a single round trip (a batch of getHeight and getBlock queries, or
+    a single getBlocks query when the missing blocks fill their bounding box).
+    The entries are grouped by regions of regionSize x regionSize columns and
+    by cubic sections of side regionSize; the regions and sections written
+    through setBlock and setBlocks (directly or in a batch) are dropped.
+
+    Only the world changes made through this object are known: changes made by
+    the players (e.g. destroyed blocks) are not seen. The queries made in a
+    batch (mc.batch()) are therefore never cached, so that the game loop (e.g.
+    the HitDetector) always reads the live world.
+
+    All the other attributes of the wrapped object remain available so it can
+    be used in its place.
+    """
+
+    def __init__(self, mc, regionSize=8):
+        """Constructor. Returns a CachedMinecraft object instance.
+
+        Keyword arguments:
+        mc: the connection to Minecraft (BatchMinecraft type object)
+        regionSize: the side length of the regions and sections
+        """
+        if regionSize <= 0:
+            raise ValueError("regionSize must be greater than 0.")
+        self._mc = mc
+        self._size = regionSize
+        self._heights = {}          # (rx, rz) -> {(x, z): height}
+        self._blocks = {}           # (rx, ry, rz) -> {(x, y, z): block type}
+        # can the server read cuboids of blocks (world.getBlocks)? None until
+        # known
+        self._hasGetBlocks = None
+        self.hits = 0               # queries answered from the cache
+        self.misses = 0             # queries that needed a world read
+        self.reads = 0              # round trips made to fill the cache
+        self.queries = 0            # queries sent to fill the cache
+
+    def __getattr__(self, name):
+        # delegate everything else to the wrapped Minecraft object
+        return getattr(self._mc, name)
+
+    def stats(self):
+        """Returns a dictionnary of the cache counters."""
+        queries = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "reads": self.reads,
+                "queries": self.queries,
+                "hitRate": self.hits / queries if queries else 0.,
+                "regions": len(self._heights), "sections": len(self._blocks)}
+
+    ## Regions
+
+    def _region(self, x, z):
+        """Returns the coordinates of the region of column x, z."""
+        return (math.floor(x) // self._size, math.floor(z) // self._size)
+
+    def _section(self, x, y, z):
+        """Returns the coordinates of the section of block x, y, z."""
+        return (math.floor(x) // self._size, math.floor(y) // self._size,
+                math.floor(z) // self._size)
+
+    def _read(self, calls):
+        """Executes a list of (method name, args) queries in a single batch.
+        Returns the list of the results."""
+        self.reads += 1
+        self.queries += len(calls)
+        with self._mc.batch() as b:
+            futures = [getattr(b, name)(*args) for name, args in calls]
+        return [f.result() for f in futures]
+
+    def _cachedHeight(self, x, z):
+        """Returns the cached height of column x, z, None if not cached."""
+        return self._heights.get(self._region(x, z), {}).get((x, z))
+
+    def _cachedBlock(self, x, y, z):
+        """Returns the cached type of block x, y, z, None if not cached."""
+        return self._blocks.get(self._section(x, y, z), {}).get((x, y, z))
+
+    def prefetchHeights(self, columns):
+        """Reads the heights of the (x, z) columns of a list not in the cache
+        yet, in a single round trip."""
+        missing = [c for c in dict.fromkeys((math.floor(x), math.floor(z))
+                                            for x, z in columns)
+                   if self._cachedHeight(*c) is None]
+        if not missing:
+            return
+        heights = self._read([("getHeight", c) for c in missing])
+        for c, height in zip(missing, heights):
+            self._heights.setdefault(self._region(*c), {})[c] = height
+
+    def prefetchBlocks(self, positions):
+        """Reads the types of the (x, y, z) blocks of a list not in the cache
+        yet, in a single round trip."""
+        missing = [p for p in dict.fromkeys(tuple(math.floor(a) for a in p)
+                                            for p in positions)
+                   if self._cachedBlock(*p) is None]
+        if not missing:
+            return
+        blocks = None
+        if len(missing) > 1 and self._hasGetBlocks is not False:
+            # read the bounding box in a single query if the missing blocks
+            # fill at least half of it
+            lo = [min(c) for c in zip(*missing)]
+            hi = [max(c) for c in zip(*missing)]
+            dx, dy, dz = [b - a + 1 for a, b in zip(lo, hi)]
+            if dx * dy * dz <= 2 * len(missing):
+                try:
+                    box = self._read([("getBlocks", (*lo, *hi))])[0]
+                    self._hasGetBlocks = True
+                except (AttributeError, RequestError):
+                    # not implemented by the server, read block by block
+                    self._hasGetBlocks = False
+                else:
+                    # cuboid blocks are ordered by y, x then z
+                    blocks = [box[((y - lo[1]) * dx + x - lo[0]) * dz
+                                  + z - lo[2]] for x, y, z in missing]
+        if blocks is None:
+            blocks = self._read([("getBlock", p) for p in missing])
+        for p, block in zip(missing, blocks):
+            self._blocks.setdefault(self._section(*p), {})[p] = block
+
+    def getHeight(self, *args):
+        """Get the height of the world (x,z) => int"""
+        x, z = math.floor(args[0]), math.floor(args[1])
+        height = self._cachedHeight(x, z)
+        if height is not None:
+            self.hits += 1
+            return height
+        self.misses += 1
+        self.prefetchHeights([(x, z)])
+        return self._cachedHeight(x, z)
+
+    def getBlock(self, *args):
+        """Get block (x,y,z) => id:int"""
+        x, y, z = [math.floor(a) for a in args[:3]]
+        block = self._cachedBlock(x, y, z)
+        if block is not None:
+            self.hits += 1
+            return block
+        self.misses += 1
+        self.prefetchBlocks([(x, y, z)])
+        return self._cachedBlock(x, y, z)
+
+    ## Writes
+
+    def invalidate(self, x0, y0, z0, x1, y1, z1):
+        """Drops the cached regions and sections intersecting a cuboid."""
+        rx0, ry0, rz0 = self._section(min(x0, x1), min(y0, y1), min(z0, z1))
+        rx1, ry1, rz1 = self._section(max(x0, x1), max(y0, y1), max(z0, z1))
+        for key in itertools.product(range(rx0, rx1 + 1), range(rz0, rz1 + 1)):
+            self._heights.pop(key, None)
+        for key in itertools.product(range(rx0, rx1 + 1), range(ry0, ry1 + 1),
+                                     range(rz0, rz1 + 1)):
+            self._blocks.pop(key, None)
+
+    def clear(self):
+        """Drops all the cached regions and sections."""
+        self._heights = {}
+        self._blocks = {}
+
+    def setBlock(self, *args):
+        """Set block (x,y,z,id,[data])"""
+        self._mc.setBlock(*args)
+        self.invalidate(*args[:3], *args[:3])
+
+    def setBlocks(self, *args):
+        """Set a cuboid of blocks (x0,y0,z0,x1,y1,z1,id,[data])"""
+        self._mc.setBlocks(*args)
+        self.invalidate(*args[:6])
+
+    def batch(self):
+        """Returns a new, empty batch of the wrapped Minecraft object, whose
+        writes drop the cached entries."""
+        return _CachedBatch(self._mc.batch(), self)
+
+class _CachedBatch:
+    """A batch of the wrapped Minecraft object of a CachedMinecraft object.
+    Its queries are not cached and its writes drop the cached entries."""
+
+    def __init__(self, batch, cache):
+        """Constructor. Returns a _CachedBatch object instance.
+
+        Keyword arguments:
+        batch: the batch of the wrapped Minecraft object
+        cache: the cache (CachedMinecraft type object)
+        """
+        self._batch = batch
+        self._cache = cache
+
+    def __getattr__(self, name):
+        # delegate everything else to the wrapped batch
+        return getattr(self._batch, name)
+
+    def __len__(self):
+        """Returns the number of calls queued."""
+        return len(self._batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return self._batch.__exit__(excType, excValue, traceback)
+
+    def setBlock(self, *args):
+        """Queues a set block command (x,y,z,id,[data])"""
+        self._batch.setBlock(*args)
+        self._cache.invalidate(*args[:3], *args[:3])
+
+    def setBlocks(self, *args):
+        """Queues a set cuboid of blocks command (x0,y0,z0,x1,y1,z1,id,[data])"""
+        self._batch.setBlocks(*args)
+        self._cache.invalidate(*args[:6])